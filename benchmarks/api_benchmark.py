@@ -0,0 +1,150 @@
+"""
+Dashboard API payload benchmark for WiFi Auto Auth.
+Seeds a scratch database with login attempts, requests a large page from
+/api/attempts through the ASGI app for each content coding, and compares the
+optimized response path with FastAPI's default encoder. Reports bytes on the
+wire and milliseconds per response.
+
+Usage:
+    python benchmarks/api_benchmark.py [--rows 10000] [--runs 5]
+"""
+
+import argparse
+import asyncio
+import base64
+import gzip
+import os
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def seed_database(db_name: str, rows: int) -> None:
+    """Insert ``rows`` synthetic login attempts spread over the last 30 days."""
+    from log_store import get_store
+
+    now = int(time.time())
+    statuses = ["200", "200", "200", "401", "500"]
+    get_store(db_name).insert_attempts(
+        (now - random.randint(0, 30 * 86400), f"network-{i % 4}", f"SSID-{i % 4}", f"user{i % 50}",
+         "******", f"session-{random.getrandbits(48):012x}", random.choice(statuses),
+         "Login successful" if i % 5 < 3 else "Authentication failed: invalid credentials", None)
+        for i in range(rows)
+    )
+
+
+async def asgi_get(app, path: str, headers: dict):
+    """Send one GET request straight into the ASGI app; return (status, headers, body)."""
+    raw_path, _, query = path.partition("?")
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1",
+        "method": "GET", "scheme": "http", "path": raw_path, "raw_path": raw_path.encode(),
+        "query_string": query.encode(), "root_path": "",
+        "headers": [(k.lower().encode(), v.encode()) for k, v in headers.items()],
+        "client": ("127.0.0.1", 0), "server": ("127.0.0.1", 80),
+    }
+    sent = False
+    response = {"status": None, "headers": {}, "body": bytearray()}
+
+    async def receive():
+        nonlocal sent
+        if not sent:
+            sent = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        await asyncio.sleep(3600)
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            response["status"] = message["status"]
+            response["headers"] = {k.decode(): v.decode() for k, v in message["headers"]}
+        elif message["type"] == "http.response.body":
+            response["body"] += message.get("body", b"")
+
+    await app(scope, receive, send)
+    return response["status"], response["headers"], bytes(response["body"])
+
+
+def timed(func, runs: int):
+    """Run func ``runs`` times; return (median milliseconds, last result)."""
+    times = []
+    result = None
+    for _ in range(max(1, runs)):
+        start = time.perf_counter()
+        result = func()
+        times.append((time.perf_counter() - start) * 1000)
+    return statistics.median(times), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure dashboard API response size and time")
+    parser.add_argument("--rows", type=int, default=10000, help="Attempts per response (default: 10000)")
+    parser.add_argument("--runs", type=int, default=5, help="Runs per measurement (default: 5)")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="wifi-api-")
+    cwd = os.getcwd()
+    try:
+        # The dashboard reads config.json, wifi_log.db and templates/ from the
+        # working directory, so run it against scratch copies
+        shutil.copy(os.path.join(REPO_ROOT, "config.example.json"), os.path.join(workdir, "config.json"))
+        os.chdir(workdir)
+        sys.path.insert(0, REPO_ROOT)
+
+        import dashboard
+        from fastapi.encoders import jsonable_encoder
+        from fastapi.responses import JSONResponse
+
+        seed_database(dashboard.DB_NAME, args.rows)
+        config = dashboard.DASHBOARD_CONFIG
+        token = base64.b64encode(f"{config['username']}:{config['password']}".encode()).decode()
+        path = f"/api/attempts?limit={args.rows}"
+        loop = asyncio.new_event_loop()
+
+        def request(headers):
+            return loop.run_until_complete(asgi_get(dashboard.app, path, {"Authorization": f"Basic {token}", **headers}))
+
+        print(f"Encoder: {'orjson' if dashboard.orjson else 'json'}; "
+              f"brotli: {'available' if dashboard.brotli else 'not installed'}; rows: {args.rows}")
+        print(f"\n{'response':<40} {'bytes':>12} {'ms':>9}")
+        print("-" * 63)
+
+        # Previous path: dicts run through jsonable_encoder and JSONResponse
+        filters = dashboard.FilterParams(limit=args.rows)
+        query_ms, attempts = timed(lambda: dashboard.get_login_attempts(filters), args.runs)
+        print(f"{'query + row dicts':<40} {'':>12} {query_ms:>9.1f}")
+        default_ms, body = timed(lambda: JSONResponse(jsonable_encoder({"attempts": attempts})).body, args.runs)
+        print(f"{'encode: FastAPI default':<40} {len(body):>12,} {default_ms:>9.1f}")
+        fast_ms, body = timed(lambda: dashboard.dump_json({"attempts": attempts}), args.runs)
+        print(f"{'encode: dump_json':<40} {len(body):>12,} {fast_ms:>9.1f}")
+        gzip_ms, gzipped = timed(lambda: gzip.compress(body, dashboard.GZIP_LEVEL), args.runs)
+        print(f"{f'compress: gzip level {dashboard.GZIP_LEVEL}':<40} {len(gzipped):>12,} {gzip_ms:>9.1f}")
+        if dashboard.brotli:
+            br_ms, compressed = timed(lambda: dashboard.brotli.compress(body, quality=dashboard.BROTLI_QUALITY),
+                                      args.runs)
+            print(f"{f'compress: brotli quality {dashboard.BROTLI_QUALITY}':<40} {len(compressed):>12,} {br_ms:>9.1f}")
+
+        # End to end through the ASGI app, per negotiated content coding
+        print()
+        etag = None
+        for label, headers in [("GET identity", {}), ("GET gzip", {"Accept-Encoding": "gzip"}),
+                               ("GET br, gzip", {"Accept-Encoding": "br, gzip"})]:
+            ms, (status, response_headers, body) = timed(lambda: request(headers), args.runs)
+            encoding = response_headers.get("content-encoding", "identity")
+            print(f"{f'{label} -> {status} {encoding}':<40} {len(body):>12,} {ms:>9.1f}")
+            etag = response_headers.get("etag", etag)
+        if etag:
+            ms, (status, _, body) = timed(lambda: request({"If-None-Match": etag}), args.runs)
+            print(f"{f'GET If-None-Match -> {status}':<40} {len(body):>12,} {ms:>9.1f}")
+        loop.close()
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
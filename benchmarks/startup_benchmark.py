@@ -0,0 +1,123 @@
+"""
+CLI startup benchmark for WiFi Auto Auth.
+Runs read-only wifi_auto_login.py commands under ``python -X importtime`` and
+reports import time and wall-clock time per command, failing if a command goes
+over the import budget or loads a module it should not need. Modules the bare
+interpreter already loads at startup (site, encodings, .pth hooks) are not
+counted against the budget.
+
+Usage:
+    python benchmarks/startup_benchmark.py [--runs 5] [--budget-ms 80]
+"""
+
+import argparse
+import os
+import re
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SCRIPT = os.path.join(REPO_ROOT, "wifi_auto_login.py")
+
+# Command arguments and the top-level modules each one must not import
+COMMANDS = [
+    (["--help"], {"requests", "cryptography", "connectivity", "portal_client"}),
+    (["--view-logs", "5"], {"requests", "cryptography", "connectivity", "portal_client"}),
+    (["--list-networks"], {"requests", "connectivity", "portal_client"}),
+    (["--detect-network"], {"requests", "connectivity", "portal_client"}),
+]
+
+IMPORTTIME_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+
+def parse_importtime(stderr: str, baseline=frozenset()):
+    """
+    Parse ``-X importtime`` output.
+
+    Args:
+        stderr: Output of a ``python -X importtime`` run
+        baseline: Top-level modules to leave out of the total
+
+    Returns:
+        Tuple of (cumulative import time of top-level modules not in baseline
+        in microseconds, set of all imported module names)
+    """
+    total = 0
+    modules = set()
+    for match in IMPORTTIME_LINE.finditer(stderr):
+        name = match.group(4)
+        modules.add(name)
+        # One space of indentation marks an import made directly by the script
+        if len(match.group(3)) == 1 and name not in baseline:
+            total += int(match.group(2))
+    return total, modules
+
+
+def run_python(args, workdir):
+    """Run the interpreter with -X importtime and return (wall seconds, stderr)."""
+    env = dict(os.environ, PYTHONPATH=REPO_ROOT)
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", *args],
+        cwd=workdir, env=env, capture_output=True, text=True,
+    )
+    return time.perf_counter() - start, result.stderr
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure wifi_auto_login.py startup cost")
+    parser.add_argument("--runs", type=int, default=5, help="Runs per command (default: 5)")
+    parser.add_argument("--budget-ms", type=float, default=80.0,
+                        help="Maximum median import time per command in ms (default: 80)")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="wifi-startup-")
+    try:
+        # Run against the example configuration in a scratch directory so the
+        # benchmark never touches the real config.json or wifi_log.db
+        shutil.copy(os.path.join(REPO_ROOT, "config.example.json"), os.path.join(workdir, "config.json"))
+
+        # Warm the bytecode cache, then record what the bare interpreter loads
+        run_python([SCRIPT, "--help"], workdir)
+        baseline = frozenset(parse_importtime(run_python(["-c", "pass"], workdir)[1])[1])
+
+        failures = []
+        print(f"{'command':<22} {'wall (ms)':>10} {'imports (ms)':>13}")
+        print("-" * 47)
+        for cmd_args, forbidden in COMMANDS:
+            walls, imports = [], []
+            loaded = set()
+            for _ in range(max(1, args.runs)):
+                elapsed, stderr = run_python([SCRIPT, *cmd_args], workdir)
+                import_us, modules = parse_importtime(stderr, baseline)
+                walls.append(elapsed * 1000)
+                imports.append(import_us / 1000)
+                loaded |= {name.split(".")[0] for name in modules - baseline}
+
+            name = " ".join(cmd_args)
+            wall_ms = statistics.median(walls)
+            import_ms = statistics.median(imports)
+            print(f"{name:<22} {wall_ms:>10.1f} {import_ms:>13.1f}")
+
+            if import_ms > args.budget_ms:
+                failures.append(f"{name}: imports took {import_ms:.1f}ms (budget {args.budget_ms:.0f}ms)")
+            unexpected = sorted(loaded & forbidden)
+            if unexpected:
+                failures.append(f"{name}: imported {', '.join(unexpected)}")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    if failures:
+        print("\nStartup budget exceeded:")
+        for failure in failures:
+            print(f"  {failure}")
+        sys.exit(1)
+    print("\nAll commands within the startup budget")
+
+
+if __name__ == "__main__":
+    main()
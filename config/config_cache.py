@@ -0,0 +1,144 @@
+"""
+Process-wide configuration cache for WiFi Auto Auth.
+Parses config.json once, encrypts plaintext passwords in place, and hands out
+decrypted configuration until the file changes on disk.
+"""
+
+import copy
+import json
+import os
+import threading
+from typing import TYPE_CHECKING, Dict, Optional, Tuple
+
+from config.logging_config import get_logger
+
+if TYPE_CHECKING:
+    from cryptography.fernet import Fernet
+
+logger = get_logger(__name__)
+
+SECRET_KEY_PATH = "config/secret.key"
+
+# cryptography is imported on first use so commands that never touch a
+# password (e.g. --view-logs) do not pay for loading it
+_fernet: Optional["Fernet"] = None
+_fernet_lock = threading.Lock()
+
+
+def get_or_create_secret_key() -> bytes:
+    """Read the Fernet key, generating and saving a new one if it does not exist."""
+    if os.path.exists(SECRET_KEY_PATH):
+        with open(SECRET_KEY_PATH, "rb") as f:
+            return f.read()
+    from cryptography.fernet import Fernet
+    key = Fernet.generate_key()
+    os.makedirs(os.path.dirname(SECRET_KEY_PATH), exist_ok=True)
+    with open(SECRET_KEY_PATH, "wb") as f:
+        f.write(key)
+    return key
+
+
+def get_fernet() -> "Fernet":
+    """Get the shared Fernet instance, reading the key file only once per process."""
+    global _fernet
+    with _fernet_lock:
+        if _fernet is None:
+            from cryptography.fernet import Fernet
+            _fernet = Fernet(get_or_create_secret_key())
+        return _fernet
+
+
+def _password_holders(config: Dict):
+    """Yield every dict in the config that may hold a "password" key."""
+    yield config
+    if isinstance(config.get("dashboard"), dict):
+        yield config["dashboard"]
+    for profile in (config.get("networks") or {}).values():
+        if isinstance(profile, dict):
+            yield profile
+
+
+def _split_passwords(config: Dict, fernet: "Fernet") -> Tuple[Dict, bool]:
+    """
+    Encrypt plaintext passwords in ``config`` in place and build a decrypted copy.
+
+    Each password is trial-decrypted exactly once: success gives the plaintext,
+    failure means it is still plaintext and gets encrypted.
+
+    Returns:
+        Tuple of (decrypted config, whether config was changed)
+    """
+    from cryptography.fernet import InvalidToken
+
+    decrypted = copy.deepcopy(config)
+    updated = False
+    for holder, plain_holder in zip(_password_holders(config), _password_holders(decrypted)):
+        value = holder.get("password")
+        if not isinstance(value, str):
+            continue
+        try:
+            plain_holder["password"] = fernet.decrypt(value.encode()).decode()
+        except InvalidToken:
+            holder["password"] = fernet.encrypt(value.encode()).decode()
+            updated = True
+    return decrypted, updated
+
+
+class ConfigCache:
+    """
+    Caches parsed configuration files keyed on path, modification time and size.
+
+    The first load of a file (and every load after it changes) parses the JSON,
+    encrypts any plaintext passwords back to disk and decrypts them once for
+    in-memory use. Later loads only cost a ``stat`` call.
+
+    Returned dicts are shared between callers and must be treated as read-only.
+    """
+
+    def __init__(self):
+        self._entries: Dict[str, Tuple[Tuple[int, int], Dict, Dict]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, path: str, decrypted: bool = True) -> Dict:
+        """
+        Get the configuration stored at ``path``.
+
+        Args:
+            path: Path of the JSON configuration file
+            decrypted: Return passwords decrypted (default) or as stored on disk
+
+        Raises:
+            FileNotFoundError: If the file does not exist
+        """
+        path = os.path.abspath(path)
+        with self._lock:
+            st = os.stat(path)
+            entry = self._entries.get(path)
+            if entry is None or entry[0] != (st.st_mtime_ns, st.st_size):
+                entry = self._load(path)
+                self._entries[path] = entry
+            return entry[2] if decrypted else entry[1]
+
+    def _load(self, path: str) -> Tuple[Tuple[int, int], Dict, Dict]:
+        """Parse the file, encrypt plaintext passwords and build the cache entry."""
+        with open(path, "r") as f:
+            config = json.load(f)
+
+        plain, updated = _split_passwords(config, get_fernet())
+        if updated:
+            with open(path, "w") as f:
+                json.dump(config, f, indent=2)
+            logger.info(f"Encrypted plaintext passwords in {path}")
+
+        st = os.stat(path)
+        logger.debug(f"Loaded configuration from {path}")
+        return (st.st_mtime_ns, st.st_size), config, plain
+
+
+# Process-wide cache used by get_config()
+_cache = ConfigCache()
+
+
+def get_config(path: str = "config.json", decrypted: bool = True) -> Dict:
+    """Get the cached configuration for ``path`` (read-only)."""
+    return _cache.get(path, decrypted)
@@ -0,0 +1,244 @@
+"""
+Connectivity checks for WiFi Auto Auth.
+Races several internet probes concurrently, detects captive portals and caches
+the verdict for a short time.
+"""
+
+import http.client
+import ipaddress
+import queue
+import socket
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+from config.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+# Connectivity states
+ONLINE = "online"
+PORTAL = "portal"  # Behind a captive portal that intercepts HTTP traffic
+OFFLINE = "offline"
+
+# Defaults used when config.json has no "connectivity" section
+DEFAULT_TIMEOUT = 3.0
+DEFAULT_CACHE_TTL = 10.0
+DEFAULT_TCP_TARGETS = [
+    ("1.1.1.1", 53),
+    ("8.8.8.8", 53),
+    ("2606:4700:4700::1111", 53),
+    ("2001:4860:4860::8888", 53),
+]
+DEFAULT_HTTP_URL = "http://connectivitycheck.gstatic.com/generate_204"
+DEFAULT_DNS_HOST = "connectivitycheck.gstatic.com"
+
+
+def tcp_probe(host: str, port: int, timeout: float) -> Optional[str]:
+    """Check connectivity by opening a TCP connection (IPv4 or IPv6 literal)."""
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    with socket.socket(family, socket.SOCK_STREAM) as s:
+        # Per-socket timeout; never touch the global default
+        s.settimeout(timeout)
+        s.connect((host, port))
+    return ONLINE
+
+
+def http_204_probe(url: str, timeout: float) -> Optional[str]:
+    """
+    Check connectivity by requesting an endpoint that answers 204 No Content.
+
+    A 204 means the internet is reachable. Any other answer (a redirect or a
+    login page served with 200) means a captive portal intercepted the request.
+    """
+    parts = urlsplit(url)
+    conn_cls = http.client.HTTPSConnection if parts.scheme == "https" else http.client.HTTPConnection
+    conn = conn_cls(parts.hostname, parts.port, timeout=timeout)
+    try:
+        conn.request("GET", parts.path or "/", headers={"Connection": "close"})
+        response = conn.getresponse()
+        if response.status == 204:
+            return ONLINE
+        logger.debug(f"Captive portal suspected: {url} answered {response.status} "
+                     f"(Location: {response.getheader('Location')})")
+        return PORTAL
+    finally:
+        conn.close()
+
+
+def dns_probe(hostname: str, timeout: float) -> Optional[str]:
+    """
+    Check connectivity by resolving a public hostname.
+
+    Only globally routable answers count, since captive portals often answer
+    every DNS query with a private address.
+    """
+    # getaddrinfo has no timeout of its own; the engine stops waiting at its
+    # deadline and the probe's daemon thread never holds up interpreter exit
+    for info in socket.getaddrinfo(hostname, None, proto=socket.IPPROTO_TCP):
+        if ipaddress.ip_address(info[4][0]).is_global:
+            return ONLINE
+    return None
+
+
+class ProbeEngine:
+    """
+    Runs connectivity probes concurrently and returns on the first decisive answer.
+
+    Probes are (name, callable, decisive) tuples; each callable returns a state
+    or None, or raises on failure. A decisive probe (the HTTP 204 check) can
+    tell ONLINE from PORTAL, so its answer wins immediately. TCP and DNS
+    probes also succeed behind many portals, so their ONLINE only counts once
+    no decisive probe can answer any more (all failed or none configured). If
+    nothing succeeds before the timeout the verdict is OFFLINE. Verdicts are
+    cached for ``cache_ttl`` seconds so repeated checks in one cycle are free.
+
+    Each probe runs on its own daemon thread. A probe still running at the
+    deadline (a DNS lookup has no timeout of its own) is abandoned, and it
+    never delays the exit of a one-shot run.
+    """
+
+    def __init__(self, probes: Optional[List[Tuple[str, Callable[[], Optional[str]], bool]]] = None,
+                 timeout: float = DEFAULT_TIMEOUT, cache_ttl: float = DEFAULT_CACHE_TTL,
+                 login_when_offline: bool = False):
+        self.timeout = timeout
+        self.cache_ttl = cache_ttl
+        self.login_when_offline = login_when_offline
+        self.probes = probes if probes is not None else self._default_probes(
+            DEFAULT_TCP_TARGETS, DEFAULT_HTTP_URL, DEFAULT_DNS_HOST)
+        self._cached: Optional[Tuple[float, str]] = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_settings(cls, settings: Optional[Dict] = None) -> "ProbeEngine":
+        """
+        Build an engine from the optional "connectivity" section of config.json:
+            {"timeout": 3, "cache_ttl": 10, "tcp_targets": [["1.1.1.1", 53]],
+             "http_url": "http://...", "dns_host": "example.com",
+             "login_when_offline": false}
+        """
+        settings = settings or {}
+        engine = cls(
+            timeout=float(settings.get("timeout", DEFAULT_TIMEOUT)),
+            cache_ttl=float(settings.get("cache_ttl", DEFAULT_CACHE_TTL)),
+            login_when_offline=bool(settings.get("login_when_offline", False)),
+        )
+        tcp_targets = [tuple(t) for t in settings.get("tcp_targets", DEFAULT_TCP_TARGETS)]
+        engine.probes = engine._default_probes(
+            tcp_targets,
+            settings.get("http_url", DEFAULT_HTTP_URL),
+            settings.get("dns_host", DEFAULT_DNS_HOST),
+        )
+        return engine
+
+    def _default_probes(self, tcp_targets, http_url,
+                        dns_host) -> List[Tuple[str, Callable[[], Optional[str]], bool]]:
+        """Build the probe list; each probe reads self.timeout when it runs."""
+        probes = [
+            (f"tcp {host}:{port}", lambda h=host, p=port: tcp_probe(h, int(p), self.timeout), False)
+            for host, port in tcp_targets
+        ]
+        if http_url:
+            probes.append((f"http {http_url}", lambda: http_204_probe(http_url, self.timeout), True))
+        if dns_host:
+            probes.append((f"dns {dns_host}", lambda: dns_probe(dns_host, self.timeout), False))
+        return probes
+
+    def check(self, use_cache: bool = True) -> str:
+        """
+        Get the current connectivity state.
+
+        Args:
+            use_cache: Return the cached verdict if it is younger than cache_ttl
+
+        Returns:
+            ONLINE, PORTAL or OFFLINE
+        """
+        with self._lock:
+            if use_cache and self._cached and time.monotonic() - self._cached[0] < self.cache_ttl:
+                return self._cached[1]
+
+            state = self._run_probes()
+            self._cached = (time.monotonic(), state)
+            return state
+
+    def is_online(self, use_cache: bool = True) -> bool:
+        """Check whether the internet is reachable."""
+        return self.check(use_cache) == ONLINE
+
+    def needs_login(self, state: str) -> bool:
+        """
+        Check whether a portal login should be attempted for a state.
+
+        Only PORTAL triggers a login, unless login_when_offline is set for
+        portals that silently drop traffic instead of redirecting it.
+        """
+        return state == PORTAL or (state == OFFLINE and self.login_when_offline)
+
+    def invalidate(self) -> None:
+        """Drop the cached verdict, e.g. after a login or a network change."""
+        with self._lock:
+            self._cached = None
+
+    def _run_probes(self) -> str:
+        """Race all probes and return the first decisive verdict."""
+        if not self.probes:
+            return OFFLINE
+
+        results: "queue.Queue[Tuple[str, bool, Optional[str]]]" = queue.Queue()
+        deadline = time.monotonic() + self.timeout
+        for name, probe, decisive in self.probes:
+            threading.Thread(target=_run_probe, args=(name, probe, decisive, results),
+                             name=f"probe {name}", daemon=True).start()
+
+        decisive_pending = sum(1 for _, _, decisive in self.probes if decisive)
+        reachable = False
+        for _ in self.probes:
+            try:
+                name, decisive, result = results.get(timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Empty:
+                logger.debug(f"Connectivity probes timed out after {self.timeout}s")
+                break
+
+            if decisive:
+                if result:
+                    logger.debug(f"Connectivity probe {name}: {result}")
+                    return result
+                decisive_pending -= 1
+            elif result == ONLINE:
+                logger.debug(f"Connectivity probe succeeded: {name}")
+                reachable = True
+
+            if reachable and decisive_pending == 0:
+                return ONLINE
+        return ONLINE if reachable else OFFLINE
+
+
+def _run_probe(name: str, probe: Callable[[], Optional[str]], decisive: bool, results: "queue.Queue") -> None:
+    """Run one probe on its own thread and report (name, decisive, state)."""
+    try:
+        result = probe()
+    except Exception as e:
+        logger.debug(f"Connectivity probe failed: {name}: {e}")
+        result = None
+    results.put((name, decisive, result))
+
+
+# Process-wide engine used by check_connectivity()
+_engine: Optional[ProbeEngine] = None
+
+
+def get_probe_engine() -> ProbeEngine:
+    """Get the shared probe engine, creating it with default settings if needed."""
+    global _engine
+    if _engine is None:
+        _engine = ProbeEngine()
+    return _engine
+
+
+def configure(settings: Optional[Dict] = None) -> ProbeEngine:
+    """Replace the shared probe engine using a "connectivity" config section."""
+    global _engine
+    _engine = ProbeEngine.from_settings(settings)
+    return _engine
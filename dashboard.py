@@ -2,15 +2,24 @@
 WiFi Auto Auth Dashboard - Web-based monitoring interface for WiFi login attempts
 """
 
-import sqlite3
+import asyncio
+import csv
+import functools
+import hashlib
+import io
 import json
 import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
 from datetime import datetime, timedelta
-from typing import List, Dict, Optional
-from fastapi import FastAPI, Request, Depends, HTTPException, status, Form
+from typing import List, Dict, Optional, Set, Tuple
+from fastapi import FastAPI, Request, Depends, HTTPException, Query, status, Form
 from fastapi.templating import Jinja2Templates
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import HTMLResponse, RedirectResponse
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import HTMLResponse, RedirectResponse, Response, StreamingResponse
 from fastapi.security import HTTPBasic, HTTPBasicCredentials
 from pydantic import BaseModel
 import uvicorn
@@ -19,6 +28,19 @@ import secrets
 from pathlib import Path
 from cryptography.fernet import Fernet
 
+from log_store import HOUR, HOUR_SQL, READ_POOL_SIZE, ReadPool, get_store, to_epoch, format_timestamp
+
+# Optional accelerators: orjson for JSON encoding, brotli for compression
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
 # Import existing logging configuration
 try:
     from config.logging_config import get_logger
@@ -31,6 +53,26 @@ except ImportError:
 # --- CONFIGURATION ---
 CONFIG_PATH = "config.json"
 DB_NAME = "wifi_log.db"
+DB_WORKERS = READ_POOL_SIZE  # queries run concurrently off the event loop
+
+# Live feed (/api/stream)
+STREAM_POLL_INTERVAL = 2.0  # seconds between change checks while anyone is subscribed
+STREAM_KEEPALIVE = 15.0  # seconds of silence before a keep-alive comment is sent
+STREAM_QUEUE_SIZE = 32  # undelivered events per subscriber before it is told to reload
+STREAM_MAX_ATTEMPTS = 200  # newest attempts included in one update
+
+# Attempt pages (/api/attempts)
+MAX_PAGE_SIZE = 10000  # largest page; use the export for more
+
+# Attempt export (/api/attempts/export)
+EXPORT_BATCH_SIZE = 1000  # rows read per query while streaming
+EXPORT_FORMATS = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+# Response compression
+COMPRESS_MIN_SIZE = 1024  # smaller responses are sent uncompressed
+GZIP_LEVEL = 6  # gzip level 9 is much slower for a few percent smaller bodies
+BROTLI_QUALITY = 5
+COMPRESS_THREAD_MIN_SIZE = 128 * 1024  # larger bodies are compressed off the event loop
 
 
 SECRET_KEY_PATH = "config/secret.key"
@@ -89,16 +131,6 @@ def load_dashboard_config():
 DASHBOARD_CONFIG = load_dashboard_config()
 
 # --- PYDANTIC MODELS ---
-class LoginAttempt(BaseModel):
-    id: int
-    timestamp: str
-    network_name: Optional[str] = None
-    network_ssid: Optional[str] = None
-    username: str
-    a: str
-    response_status: str
-    response_message: str
-
 class DashboardStats(BaseModel):
     total_attempts: int
     successful_attempts: int
@@ -112,9 +144,18 @@ class FilterParams(BaseModel):
     status_filter: Optional[str] = None
     network_filter: Optional[str] = None
     limit: int = 50
+    before_id: Optional[int] = None
+    after_id: Optional[int] = None
 
 # --- FASTAPI APP SETUP ---
-app = FastAPI(title="WiFi Auto Auth Dashboard", version="1.0.0")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Release database resources when the server shuts down"""
+    yield
+    change_feed.close()
+    close_db_connections()
+
+app = FastAPI(title="WiFi Auto Auth Dashboard", version="1.0.0", lifespan=lifespan)
 
 # Setup templates and static files
 templates = Jinja2Templates(directory="templates")
@@ -125,6 +166,12 @@ static_dir.mkdir(exist_ok=True)
 
 app.mount("/static", StaticFiles(directory="static"), name="static")
 
+# gzip for every response the client accepts it for. JSON API responses are
+# brotli-compressed first when possible (api_response). GZipMiddleware passes
+# through responses that set Content-Encoding, and from Starlette 0.46 it skips
+# text/event-stream, so the SSE feed is not buffered (see requirements.txt)
+app.add_middleware(GZipMiddleware, minimum_size=COMPRESS_MIN_SIZE, compresslevel=GZIP_LEVEL)
+
 # Simple authentication
 security = HTTPBasic()
 
@@ -142,140 +189,177 @@ def authenticate(credentials: HTTPBasicCredentials = Depends(security)):
     return credentials.username
 
 # --- DATABASE FUNCTIONS ---
-def get_db_connection():
-    """Get database connection"""
-    conn = sqlite3.connect(DB_NAME)
-    
-    if not os.path.exists(DB_NAME):
-        logger.warning(f"Database {DB_NAME} not found. Creating new database.")
-    
-    # Ensure table exists with multi-network support
-    cursor = conn.cursor()
-    
-    # Check if table exists and get its schema
-    cursor.execute("PRAGMA table_info(login_attempts)")
-    columns = [row[1] for row in cursor.fetchall()]
-    
-    if not columns:
-        # Create new table with network support
-        cursor.execute("""
-            CREATE TABLE login_attempts (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                timestamp TEXT,
-                network_name TEXT,
-                network_ssid TEXT,
-                username TEXT,
-                password TEXT,
-                a TEXT,
-                response_status TEXT,
-                response_message TEXT
-            )
-        """)
-        logger.info("Created new login_attempts table with network support")
-    else:
-        # Check if we need to add network columns to existing table
-        if 'network_name' not in columns:
-            cursor.execute("ALTER TABLE login_attempts ADD COLUMN network_name TEXT")
-            logger.info("Added network_name column to existing table")
-        
-        if 'network_ssid' not in columns:
-            cursor.execute("ALTER TABLE login_attempts ADD COLUMN network_ssid TEXT")
-            logger.info("Added network_ssid column to existing table")
-    
-    conn.commit()
-    return conn
+# Queries run on a bounded pool of worker threads, each borrowing one of as
+# many read-only connections, so a slow aggregation never blocks the event loop
+_db_executor = ThreadPoolExecutor(max_workers=DB_WORKERS, thread_name_prefix="dashboard-db")
+_read_pool: Optional[ReadPool] = None
+_read_pool_lock = threading.Lock()
+
+def get_db_connection() -> ReadPool:
+    """Get the shared pool of read-only database connections"""
+    global _read_pool
+    with _read_pool_lock:
+        if _read_pool is None:
+            # Opening the store creates the database and runs schema migrations
+            get_store(DB_NAME)
+            _read_pool = ReadPool(DB_NAME, DB_WORKERS)
+        return _read_pool
+
+async def run_db(func, *args):
+    """Run a blocking database function on the query thread pool"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_db_executor, functools.partial(func, *args))
+
+def close_db_connections():
+    """Stop the query threads and close the read-only connections"""
+    _db_executor.shutdown(wait=True)
+    if _read_pool is not None:
+        _read_pool.close()
+
+def get_data_version() -> Tuple[int, int, int]:
+    """
+    Get a cheap version of the login history: (newest id, oldest id, total).
 
-def get_login_attempts(filters: FilterParams, network_filter: Optional[str] = None) -> List[Dict]:
-    """Get login attempts with filters"""
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
-    # Check if table has network columns
-    cursor.execute("PRAGMA table_info(login_attempts)")
-    columns = [row[1] for row in cursor.fetchall()]
-    has_network_columns = 'network_name' in columns and 'network_ssid' in columns
-    
-    if has_network_columns:
-        query = """
-            SELECT id, timestamp, network_name, network_ssid, username, a, response_status, response_message 
-            FROM login_attempts 
-            WHERE 1=1
-        """
-    else:
-        query = """
-            SELECT id, timestamp, username, a, response_status, response_message 
-            FROM login_attempts 
-            WHERE 1=1
-        """
-    
+    All three are single index lookups. Inserts move the newest id and the
+    total, clearing the logs moves the total, and retention pruning moves
+    the oldest id.
+    """
+    store = get_db_connection()
+    row = store.query_one("""
+        SELECT (SELECT MAX(id) FROM login_attempts),
+               (SELECT MIN(id) FROM login_attempts),
+               (SELECT total FROM attempt_counters WHERE scope = 'all')
+    """)
+    return tuple(value or 0 for value in row)
+
+ATTEMPT_FIELDS = "id, timestamp, network_name, network_ssid, username, a, response_status, response_message"
+
+def attempt_to_dict(row: Tuple) -> Dict:
+    """Convert a login_attempts row selected with ATTEMPT_FIELDS to its API form"""
+    return {
+        "id": row[0],
+        "timestamp": format_timestamp(row[1]),
+        "network_name": row[2],
+        "network_ssid": row[3],
+        "username": row[4],
+        "a": row[5],
+        "response_status": row[6],
+        "response_message": row[7]
+    }
+
+def encode_attempts(rows: List[Tuple], format: str) -> bytes:
+    """Encode a batch of attempt rows as NDJSON lines or CSV records"""
+    if format == "csv":
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerows(attempt_to_dict(row).values() for row in rows)
+        return buffer.getvalue().encode("utf-8")
+    return b"".join(dump_json(attempt_to_dict(row)) + b"\n" for row in rows)
+
+def attempt_filter_sql(filters: FilterParams, network_filter: Optional[str] = None) -> Tuple[str, List]:
+    """
+    Build the SQL conditions for attempt filters.
+
+    Returns:
+        Tuple of (" AND ..." conditions, parameters)
+
+    Raises:
+        ValueError: If a date filter cannot be parsed
+    """
+    conditions = ""
     params = []
     
+    # Timestamps are epoch seconds, so date filters are indexed integer ranges
     if filters.start_date:
-        query += " AND timestamp >= ?"
-        params.append(filters.start_date)
+        conditions += " AND timestamp >= ?"
+        params.append(to_epoch(filters.start_date))
     
     if filters.end_date:
-        query += " AND timestamp <= ?"
-        params.append(filters.end_date)
+        conditions += " AND timestamp <= ?"
+        params.append(to_epoch(filters.end_date))
     
     if filters.status_filter:
         if filters.status_filter == "success":
-            query += " AND response_status = '200'"
+            conditions += " AND response_status = '200'"
         elif filters.status_filter == "failed":
-            query += " AND response_status != '200'"
+            conditions += " AND response_status != '200'"
     
-    if network_filter and has_network_columns:
-        query += " AND network_name = ?"
+    if network_filter:
+        conditions += " AND network_name = ?"
         params.append(network_filter)
     
-    query += " ORDER BY timestamp DESC LIMIT ?"
+    return conditions, params
+
+def get_login_attempts(filters: FilterParams, network_filter: Optional[str] = None) -> List[Dict]:
+    """
+    Get one page of login attempts with filters, newest first.
+
+    Pages are keyset ranges of the attempt id: pass the smallest id of a page
+    as ``before_id`` for the next older page, or the largest id seen as
+    ``after_id`` for attempts logged since. Each page is an index range scan,
+    however deep into history it is.
+    """
+    store = get_db_connection()
+    
+    conditions, params = attempt_filter_sql(filters, network_filter)
+    
+    if filters.before_id is not None:
+        conditions += " AND id < ?"
+        params.append(filters.before_id)
+    
+    if filters.after_id is not None:
+        conditions += " AND id > ?"
+        params.append(filters.after_id)
+    
+    # Paging forward from after_id reads upwards, so no attempt is skipped
+    # when more than a page has been logged since
+    ascending = filters.after_id is not None and filters.before_id is None
+    
+    query = f"""
+        SELECT {ATTEMPT_FIELDS}
+        FROM login_attempts 
+        WHERE 1=1{conditions}
+        ORDER BY id {"ASC" if ascending else "DESC"} LIMIT ?
+    """
     params.append(filters.limit)
     
-    cursor.execute(query, params)
-    rows = cursor.fetchall()
-    conn.close()
-    
-    if has_network_columns:
-        return [
-            {
-                "id": row[0],
-                "timestamp": row[1],
-                "network_name": row[2],
-                "network_ssid": row[3],
-                "username": row[4],
-                "a": row[5],
-                "response_status": row[6],
-                "response_message": row[7]
-            }
-            for row in rows
-        ]
-    else:
-        return [
-            {
-                "id": row[0],
-                "timestamp": row[1],
-                "network_name": "Legacy",
-                "network_ssid": "Unknown",
-                "username": row[2],
-                "a": row[3],
-                "response_status": row[4],
-                "response_message": row[5]
-            }
-            for row in rows
-        ]
+    rows = store.query(query, params)
+    if ascending:
+        rows.reverse()
+    
+    return [attempt_to_dict(row) for row in rows]
+
+def get_attempt_batch(conditions: str, params: List, after_id: int, size: int = EXPORT_BATCH_SIZE) -> List[Tuple]:
+    """Get the next ``size`` filtered attempt rows with id > after_id, oldest first"""
+    store = get_db_connection()
+    return store.query(f"""
+        SELECT {ATTEMPT_FIELDS}
+        FROM login_attempts
+        WHERE id > ?{conditions}
+        ORDER BY id LIMIT ?
+    """, [after_id, *params, size])
+
+def get_attempts_since(after_id: int, max_id: int, limit: int = STREAM_MAX_ATTEMPTS) -> List[Dict]:
+    """Get the newest attempts with after_id < id <= max_id, newest first"""
+    store = get_db_connection()
+    rows = store.query(f"""
+        SELECT {ATTEMPT_FIELDS}
+        FROM login_attempts
+        WHERE id > ? AND id <= ?
+        ORDER BY id DESC LIMIT ?
+    """, (after_id, max_id, limit))
+    return [attempt_to_dict(row) for row in rows]
 
 def get_dashboard_stats() -> DashboardStats:
     """Get dashboard statistics"""
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
-    # Total attempts
-    cursor.execute("SELECT COUNT(*) FROM login_attempts")
-    total_attempts = cursor.fetchone()[0]
+    store = get_db_connection()
     
-    # Successful attempts (assuming 200 is success)
-    cursor.execute("SELECT COUNT(*) FROM login_attempts WHERE response_status = '200'")
-    successful_attempts = cursor.fetchone()[0]
+    # Running totals kept by a trigger on login_attempts (see log_store),
+    # including attempts pruned by retention; success means status 200
+    row = store.query_one(
+        "SELECT total, success, last_attempt FROM attempt_counters WHERE scope = 'all'"
+    ) or (0, 0, None)
+    total_attempts, successful_attempts, last_attempt = row
     
     # Failed attempts
     failed_attempts = total_attempts - successful_attempts
@@ -283,50 +367,32 @@ def get_dashboard_stats() -> DashboardStats:
     # Success rate
     success_rate = (successful_attempts / total_attempts * 100) if total_attempts > 0 else 0
     
-    # Last attempt
-    cursor.execute("SELECT timestamp FROM login_attempts ORDER BY timestamp DESC LIMIT 1")
-    last_attempt_row = cursor.fetchone()
-    last_attempt = last_attempt_row[0] if last_attempt_row else None
-    
-    conn.close()
-    
     return DashboardStats(
         total_attempts=total_attempts,
         successful_attempts=successful_attempts,
         failed_attempts=failed_attempts,
         success_rate=round(success_rate, 2),
-        last_attempt=last_attempt
+        last_attempt=format_timestamp(last_attempt)
     )
 
 def get_network_stats() -> List[Dict]:
     """Get statistics per network profile"""
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
-    # Check if table has network columns
-    cursor.execute("PRAGMA table_info(login_attempts)")
-    columns = [row[1] for row in cursor.fetchall()]
-    has_network_columns = 'network_name' in columns and 'network_ssid' in columns
-    
-    if not has_network_columns:
-        return []
+    store = get_db_connection()
     
+    # One counter row per (network, SSID), maintained on insert
     query = """
         SELECT 
             network_name,
-            network_ssid,
-            COUNT(*) as total_attempts,
-            SUM(CASE WHEN response_status = '200' THEN 1 ELSE 0 END) as successful_attempts,
-            MAX(timestamp) as last_attempt
-        FROM login_attempts 
-        WHERE network_name IS NOT NULL
-        GROUP BY network_name, network_ssid
+            NULLIF(network_ssid, '') as network_ssid,
+            total as total_attempts,
+            success as successful_attempts,
+            last_attempt
+        FROM attempt_counters 
+        WHERE scope = 'network' AND network_name != ''
         ORDER BY total_attempts DESC
     """
     
-    cursor.execute(query)
-    rows = cursor.fetchall()
-    conn.close()
+    rows = store.query(query)
     
     stats = []
     for row in rows:
@@ -341,36 +407,132 @@ def get_network_stats() -> List[Dict]:
             "successful_attempts": successful,
             "failed_attempts": failed,
             "success_rate": round(success_rate, 2),
-            "last_attempt": last_attempt
+            "last_attempt": format_timestamp(last_attempt)
         })
     
     return stats
 
+class HourlyStatsCache:
+    """
+    Incremental cache of the hourly attempt histogram.
+
+    Buckets are loaded once per hour and then only updated from rows whose id
+    is above the high-water mark, so a refresh costs one small query over the
+    newest rows instead of a multi-day aggregation. Rollups made by retention
+    keep the same per-hour totals, so cached buckets stay valid after pruning.
+    The cache is rebuilt when the global counters disagree with what it has
+    seen (e.g. after the logs were cleared).
+    """
+
+    def __init__(self):
+        self._buckets: Dict[int, List[int]] = {}  # hour -> [total, success]
+        self._from_hour: Optional[int] = None  # first hour held in _buckets
+        self._high_water = 0  # largest login_attempts id counted
+        self._total = 0  # global attempt counter when last synced
+        self._lock = threading.Lock()
+
+    def get(self, store, start_hour: int) -> List[tuple]:
+        """
+        Get (hour, total, success) tuples for every hour from ``start_hour`` on.
+
+        Args:
+            store: LogStore to read from
+            start_hour: First epoch hour of the window
+        """
+        with self._lock:
+            # One statement, so the counter and the id bound share a snapshot
+            total, max_id = store.query_one("""
+                SELECT (SELECT total FROM attempt_counters WHERE scope = 'all'),
+                       (SELECT MAX(id) FROM login_attempts)
+            """)
+            total, max_id = total or 0, max_id or 0
+
+            if self._from_hour is not None and not self._catch_up(store, total, max_id):
+                logger.debug("Hourly stats cache out of sync, rebuilding")
+                self._buckets.clear()
+                self._from_hour = None
+
+            if self._from_hour is None:
+                self._load(store, start_hour, None, max_id)
+                self._high_water, self._total = max_id, total
+            elif start_hour < self._from_hour:
+                # Widen the window; newer rows are picked up by _catch_up
+                self._load(store, start_hour, self._from_hour, self._high_water)
+
+            return sorted(
+                (hour, bucket[0], bucket[1])
+                for hour, bucket in self._buckets.items()
+                if hour >= start_hour
+            )
+
+    def _catch_up(self, store, total: int, max_id: int) -> bool:
+        """Add rows above the high-water mark; return False if a rebuild is needed."""
+        if max_id == self._high_water:
+            return total == self._total
+        if max_id < self._high_water:
+            return False
+
+        rows = store.query(f"""
+            SELECT {HOUR_SQL}, COUNT(*), SUM(response_status = '200')
+            FROM login_attempts
+            WHERE id > ? AND id <= ?
+            GROUP BY 1
+        """, (self._high_water, max_id))
+        if total != self._total + sum(row[1] for row in rows):
+            return False
+
+        for hour, count, success in rows:
+            if hour >= self._from_hour:
+                bucket = self._buckets.setdefault(hour, [0, 0])
+                bucket[0] += count
+                bucket[1] += success
+        self._high_water, self._total = max_id, total
+        return True
+
+    def _load(self, store, start_hour: int, end_hour: Optional[int], max_id: int) -> None:
+        """Aggregate hours in [start_hour, end_hour) from raw rows up to ``max_id`` and rollups."""
+        raw_bound = "" if end_hour is None else f" AND {HOUR_SQL} < ?"
+        rollup_bound = "" if end_hour is None else " AND hour < ?"
+        params = (start_hour,) if end_hour is None else (start_hour, end_hour)
+
+        # The epoch hour is indexed (idx_attempts_hour), so this reads only
+        # the index; hours older than the retention period come from the rollups
+        rows = store.query(f"""
+            SELECT hour, SUM(total), SUM(success)
+            FROM (
+                SELECT {HOUR_SQL} as hour, COUNT(*) as total, SUM(response_status = '200') as success
+                FROM login_attempts
+                WHERE {HOUR_SQL} >= ?{raw_bound} AND id <= ?
+                GROUP BY 1
+                UNION ALL
+                SELECT hour, total, success
+                FROM attempt_rollups
+                WHERE hour >= ?{rollup_bound}
+            )
+            GROUP BY hour
+        """, (*params, max_id, *params))
+
+        for hour, count, success in rows:
+            self._buckets[hour] = [count, success]
+        self._from_hour = start_hour
+
+
+_hourly_cache = HourlyStatsCache()
+
 def get_hourly_stats(days: int = 7) -> List[Dict]:
     """Get hourly login attempt statistics for the last N days"""
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
-    start_date = datetime.now() - timedelta(days=days)
-    
-    query = """
-        SELECT 
-            strftime('%Y-%m-%d %H', timestamp) as hour,
-            COUNT(*) as total_attempts,
-            SUM(CASE WHEN response_status = '200' THEN 1 ELSE 0 END) as successful_attempts
-        FROM login_attempts 
-        WHERE timestamp >= ?
-        GROUP BY strftime('%Y-%m-%d %H', timestamp)
-        ORDER BY hour
-    """
-    
-    cursor.execute(query, (start_date.isoformat(),))
-    rows = cursor.fetchall()
-    conn.close()
+    start_hour = int((datetime.now() - timedelta(days=days)).timestamp()) // HOUR
+    return get_hourly_stats_since(start_hour)
+
+def get_hourly_stats_since(start_hour: int) -> List[Dict]:
+    """Get hourly login attempt statistics from an epoch hour on"""
+    store = get_db_connection()
+    rows = _hourly_cache.get(store, start_hour)
     
     return [
         {
-            "hour": row[0],
+            "hour": datetime.fromtimestamp(row[0] * HOUR).strftime("%Y-%m-%d %H"),
+            "hour_start": row[0] * HOUR,
             "total_attempts": row[1],
             "successful_attempts": row[2],
             "failed_attempts": row[1] - row[2]
@@ -378,6 +540,172 @@ def get_hourly_stats(days: int = 7) -> List[Dict]:
         for row in rows
     ]
 
+class ChangeFeed:
+    """
+    A single change detector shared by every /api/stream subscriber.
+
+    While anyone is subscribed, one task checks the newest attempt id and the
+    global counter every STREAM_POLL_INTERVAL seconds; only when they move does
+    it read the new attempts, the counters and the touched hourly buckets, once,
+    and fan the event out to all subscribers. Database load follows the write
+    rate rather than the number of open dashboards.
+
+    Events are ("update", {attempts, stats, hourly_stats}) or ("reset", {stats})
+    when history was cleared or a subscriber fell too far behind.
+    """
+
+    def __init__(self, interval: float = STREAM_POLL_INTERVAL):
+        self.interval = interval
+        self._subscribers: Set[asyncio.Queue] = set()
+        self._task: Optional[asyncio.Task] = None
+        self._version: Optional[Tuple[int, int]] = None  # (max id, total) last seen
+
+    def subscribe(self) -> asyncio.Queue:
+        """Register a subscriber, starting the detector if it is not running"""
+        queue = asyncio.Queue(maxsize=STREAM_QUEUE_SIZE)
+        self._subscribers.add(queue)
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue) -> None:
+        """Remove a subscriber; the detector stops after the last one leaves"""
+        self._subscribers.discard(queue)
+
+    def close(self) -> None:
+        """Stop the detector (server shutdown)"""
+        self._subscribers.clear()
+        if self._task is not None:
+            self._task.cancel()
+
+    async def _run(self):
+        while self._subscribers:
+            try:
+                event = await run_db(self._check)
+            except Exception as e:
+                logger.error(f"Live feed change check failed: {e}")
+            else:
+                if event:
+                    self._publish(*event)
+            await asyncio.sleep(self.interval)
+        # Start from a fresh baseline when the next subscriber arrives
+        self._version = None
+
+    def _check(self) -> Optional[Tuple[str, Dict]]:
+        """Compare the data version with the last check and build the event, if any"""
+        store = get_db_connection()
+        max_id, total = store.query_one("""
+            SELECT (SELECT MAX(id) FROM login_attempts),
+                   (SELECT total FROM attempt_counters WHERE scope = 'all')
+        """)
+        version = (max_id or 0, total or 0)
+        previous, self._version = self._version, version
+        if previous is None or version == previous:
+            return None
+
+        stats = get_dashboard_stats().model_dump()
+        last_id, last_total = previous
+        new_rows, first_hour = store.query_one(
+            f"SELECT COUNT(*), MIN({HOUR_SQL}) FROM login_attempts WHERE id > ? AND id <= ?",
+            (last_id, version[0])
+        )
+        if version[1] != last_total + new_rows:
+            # Rows went away (logs cleared): subscribers reload everything
+            return "reset", {"stats": stats}
+
+        return "update", {
+            "attempts": get_attempts_since(last_id, version[0]),
+            "stats": stats,
+            "hourly_stats": get_hourly_stats_since(first_hour) if first_hour is not None else [],
+        }
+
+    def _publish(self, name: str, data: Dict) -> None:
+        for queue in list(self._subscribers):
+            try:
+                queue.put_nowait((name, data))
+            except asyncio.QueueFull:
+                # Too far behind to catch up event by event
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait(("reset", {"stats": data["stats"]}))
+
+
+change_feed = ChangeFeed()
+
+# --- CONDITIONAL REQUESTS ---
+def make_etag(*parts) -> str:
+    """Build a weak ETag from the data version and request parameters"""
+    digest = hashlib.sha1(repr(parts).encode()).hexdigest()[:20]
+    return f'W/"{digest}"'
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """Check If-None-Match against an ETag (weak comparison)"""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == opaque for tag in header.split(","))
+
+async def check_etag(request: Request, response: Response, *parts) -> Optional[Response]:
+    """
+    Compute the ETag for a JSON API response from the current data version.
+
+    Sets the ETag on ``response`` and returns a 304 response if the client
+    already has this version, so the caller can skip its query entirely.
+    """
+    version = await run_db(get_data_version)
+    etag = make_etag(request.url.path, version, *parts)
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if etag_matches(request, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    response.headers.update(headers)
+    return None
+
+# --- JSON RESPONSES ---
+def dump_json(content) -> bytes:
+    """Encode content as compact UTF-8 JSON, with orjson when it is installed"""
+    if orjson is not None:
+        return orjson.dumps(content)
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+def accepts_encoding(request: Request, coding: str) -> bool:
+    """Check whether the client's Accept-Encoding allows a content coding"""
+    for item in request.headers.get("accept-encoding", "").split(","):
+        name, _, params = item.partition(";")
+        if name.strip().lower() != coding:
+            continue
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    return float(value) > 0
+                except ValueError:
+                    return False
+        return True
+    return False
+
+async def api_response(request: Request, response: Response, content: Dict) -> Response:
+    """
+    Build a JSON API response without FastAPI's per-value encoding pass.
+
+    The payload must already be plain JSON types. Large bodies are brotli
+    compressed here when brotli is installed and the client accepts it;
+    otherwise GZipMiddleware gzips them. Headers set on ``response`` (the
+    ETag) are carried over.
+    """
+    body = dump_json(content)
+    headers = {key: value for key, value in response.headers.items() if key != "content-length"}
+    if brotli is not None and len(body) >= COMPRESS_MIN_SIZE and accepts_encoding(request, "br"):
+        if len(body) >= COMPRESS_THREAD_MIN_SIZE:
+            body = await asyncio.to_thread(brotli.compress, body, quality=BROTLI_QUALITY)
+        else:
+            body = brotli.compress(body, quality=BROTLI_QUALITY)
+        headers["Content-Encoding"] = "br"
+        headers["Vary"] = "Accept-Encoding"
+    return Response(body, media_type="application/json", headers=headers)
+
 # --- ROUTES ---
 @app.get("/", response_class=HTMLResponse)
 async def dashboard(request: Request, username: str = Depends(authenticate)):
@@ -386,11 +714,11 @@ async def dashboard(request: Request, username: str = Depends(authenticate)):
     
     # Get recent login attempts
     filters = FilterParams(limit=10)
-    recent_attempts = get_login_attempts(filters)
+    recent_attempts = await run_db(get_login_attempts, filters)
     
     # Get statistics
-    stats = get_dashboard_stats()
-    network_stats = get_network_stats()
+    stats = await run_db(get_dashboard_stats)
+    network_stats = await run_db(get_network_stats)
     
     return templates.TemplateResponse("dashboard.html", {
         "request": request,
@@ -402,50 +730,154 @@ async def dashboard(request: Request, username: str = Depends(authenticate)):
 
 @app.get("/api/attempts")
 async def get_attempts_api(
+    request: Request,
+    response: Response,
     start_date: Optional[str] = None,
     end_date: Optional[str] = None,
     status_filter: Optional[str] = None,
     network_filter: Optional[str] = None,
-    limit: int = 50,
+    limit: int = Query(50, ge=1, le=MAX_PAGE_SIZE),
+    before_id: Optional[int] = None,
+    after_id: Optional[int] = None,
     username: str = Depends(authenticate)
 ):
-    """API endpoint to get login attempts with filters"""
+    """API endpoint to get login attempts with filters, paged by attempt id"""
     filters = FilterParams(
         start_date=start_date,
         end_date=end_date,
         status_filter=status_filter,
         network_filter=network_filter,
-        limit=limit
+        limit=limit,
+        before_id=before_id,
+        after_id=after_id
     )
     
-    attempts = get_login_attempts(filters, network_filter)
+    not_modified = await check_etag(request, response, start_date, end_date, status_filter, network_filter,
+                                    limit, before_id, after_id)
+    if not_modified:
+        return not_modified
+    
+    try:
+        attempts = await run_db(get_login_attempts, filters, network_filter)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Invalid date filter: {e}")
     logger.info(f"API call: Retrieved {len(attempts)} login attempts")
     
-    return {"attempts": attempts}
+    return await api_response(request, response, {
+        "attempts": attempts,
+        # Cursors: next older page, and attempts logged after this page
+        "next_before_id": attempts[-1]["id"] if attempts and len(attempts) == limit else None,
+        "next_after_id": attempts[0]["id"] if attempts else after_id
+    })
+
+@app.get("/api/attempts/export")
+async def export_attempts_api(
+    format: str = "ndjson",
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    status_filter: Optional[str] = None,
+    network_filter: Optional[str] = None,
+    after_id: int = 0,
+    username: str = Depends(authenticate)
+):
+    """Stream all matching login attempts, oldest first, as NDJSON or CSV"""
+    if format not in EXPORT_FORMATS:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
+                            detail=f"Unsupported export format: {format} (use {' or '.join(EXPORT_FORMATS)})")
+    
+    filters = FilterParams(start_date=start_date, end_date=end_date, status_filter=status_filter)
+    try:
+        conditions, params = attempt_filter_sql(filters, network_filter)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Invalid date filter: {e}")
+    
+    async def rows():
+        # Each batch is a short keyset query, so an export of any size holds
+        # one batch in memory and never pins a pooled connection
+        last_id = after_id
+        exported = 0
+        if format == "csv":
+            yield (",".join(ATTEMPT_FIELDS.split(", ")) + "\r\n").encode("utf-8")
+        while True:
+            batch = await run_db(get_attempt_batch, conditions, params, last_id)
+            if not batch:
+                break
+            yield encode_attempts(batch, format)
+            exported += len(batch)
+            last_id = batch[-1][0]
+            if len(batch) < EXPORT_BATCH_SIZE:
+                break
+        logger.info(f"API call: Exported {exported} login attempts as {format}")
+    
+    return StreamingResponse(
+        rows(),
+        media_type=EXPORT_FORMATS[format],
+        headers={"Content-Disposition": f'attachment; filename="login_attempts.{format}"'}
+    )
 
 @app.get("/api/stats")
-async def get_stats_api(username: str = Depends(authenticate)):
+async def get_stats_api(request: Request, response: Response, username: str = Depends(authenticate)):
     """API endpoint to get dashboard statistics"""
-    stats = get_dashboard_stats()
+    not_modified = await check_etag(request, response)
+    if not_modified:
+        return not_modified
+    
+    stats = await run_db(get_dashboard_stats)
     logger.info("API call: Retrieved dashboard statistics")
     
-    return {"stats": stats}
+    return await api_response(request, response, {"stats": stats.model_dump()})
 
 @app.get("/api/network-stats")
-async def get_network_stats_api(username: str = Depends(authenticate)):
+async def get_network_stats_api(request: Request, response: Response, username: str = Depends(authenticate)):
     """API endpoint to get network-specific statistics"""
-    network_stats = get_network_stats()
+    not_modified = await check_etag(request, response)
+    if not_modified:
+        return not_modified
+    
+    network_stats = await run_db(get_network_stats)
     logger.info("API call: Retrieved network statistics")
     
-    return {"network_stats": network_stats}
-    return stats
+    return await api_response(request, response, {"network_stats": network_stats})
 
 @app.get("/api/hourly-stats")
-async def get_hourly_stats_api(days: int = 7, username: str = Depends(authenticate)):
+async def get_hourly_stats_api(request: Request, response: Response, days: int = 7,
+                               username: str = Depends(authenticate)):
     """API endpoint to get hourly statistics"""
-    stats = get_hourly_stats(days)
+    # The window moves every hour even when no attempts are logged
+    not_modified = await check_etag(request, response, days, int(time.time()) // HOUR)
+    if not_modified:
+        return not_modified
+    
+    stats = await run_db(get_hourly_stats, days)
     logger.info(f"API call: Retrieved hourly statistics for last {days} days")
-    return {"hourly_stats": stats}
+    return await api_response(request, response, {"hourly_stats": stats})
+
+@app.get("/api/stream")
+async def stream_api(request: Request, username: str = Depends(authenticate)):
+    """Server-Sent Events feed of new login attempts and updated statistics"""
+    async def events():
+        queue = change_feed.subscribe()
+        logger.info(f"Live feed opened by user: {username}")
+        try:
+            yield "retry: 5000\n\n"
+            while True:
+                try:
+                    name, data = await asyncio.wait_for(queue.get(), STREAM_KEEPALIVE)
+                except asyncio.TimeoutError:
+                    if await request.is_disconnected():
+                        break
+                    yield ": keep-alive\n\n"
+                    continue
+                yield f"event: {name}\ndata: {dump_json(data).decode()}\n\n"
+        finally:
+            change_feed.unsubscribe(queue)
+            logger.info(f"Live feed closed for user: {username}")
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
 
 @app.get("/login", response_class=HTMLResponse)
 async def login_page(request: Request):
@@ -472,7 +904,9 @@ def start_dashboard_server(host: str = None, port: int = None, debug: bool = Fal
         host=host,
         port=port,
         reload=debug,
-        log_level="info"
+        log_level="info",
+        # Open /api/stream connections would otherwise hold up shutdown
+        timeout_graceful_shutdown=5
     )
 
 if __name__ == "__main__":
@@ -0,0 +1,297 @@
+"""
+Native Linux wireless queries for WiFi Auto Auth.
+Reads the current SSID/BSSID straight from the kernel (nl80211 over generic
+netlink, with a Wireless Extensions ioctl fallback) instead of spawning
+iwgetid/nmcli/iwconfig, and subscribes to rtnetlink link change events.
+"""
+
+import array
+import fcntl
+import os
+import socket
+import struct
+from typing import Dict, List, Optional, Tuple
+
+from config.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+SYSFS_NET = "/sys/class/net"
+
+# Netlink / generic netlink constants (linux/netlink.h, linux/genetlink.h)
+NETLINK_ROUTE = 0
+NETLINK_GENERIC = 16
+NLMSG_ERROR = 2
+NLMSG_DONE = 3
+NLM_F_REQUEST = 0x1
+NLM_F_ACK = 0x4
+GENL_ID_CTRL = 0x10
+CTRL_CMD_GETFAMILY = 3
+CTRL_ATTR_FAMILY_ID = 1
+CTRL_ATTR_FAMILY_NAME = 2
+
+# rtnetlink constants (linux/rtnetlink.h, linux/if_link.h, linux/if.h)
+RTMGRP_LINK = 0x1
+RTM_NEWLINK = 16
+RTM_DELLINK = 17
+IFLA_IFNAME = 3
+IFF_LOWER_UP = 0x10000
+
+# nl80211 constants (linux/nl80211.h)
+NL80211_CMD_GET_INTERFACE = 5
+NL80211_ATTR_IFINDEX = 3
+NL80211_ATTR_SSID = 52
+
+# Wireless Extensions ioctls (linux/wireless.h)
+SIOCGIWAP = 0x8B15
+SIOCGIWESSID = 0x8B1B
+IW_ESSID_MAX_SIZE = 32
+IFNAMSIZ = 16
+IWREQ_SIZE = 32
+
+_NLMSGHDR = struct.Struct("=IHHII")
+_GENLMSGHDR = struct.Struct("=BBH")
+_NLATTR = struct.Struct("=HH")
+_IFINFOMSG = struct.Struct("=BxHiII")
+
+
+class WirelessError(OSError):
+    """Raised when the kernel interface cannot be queried at all."""
+
+
+def list_wireless_interfaces() -> List[str]:
+    """List network interfaces that are wireless according to sysfs."""
+    try:
+        names = sorted(os.listdir(SYSFS_NET))
+    except OSError:
+        return []
+    return [
+        name for name in names
+        if os.path.exists(os.path.join(SYSFS_NET, name, "wireless"))
+        or os.path.exists(os.path.join(SYSFS_NET, name, "phy80211"))
+    ]
+
+
+def link_is_up(ifname: str) -> bool:
+    """Check whether an interface has carrier (IFF_LOWER_UP) according to sysfs."""
+    try:
+        with open(os.path.join(SYSFS_NET, ifname, "carrier")) as f:
+            return f.read().strip() == "1"
+    except OSError:
+        # Reading carrier fails with EINVAL while the interface is down
+        return False
+
+
+def _pack_attr(attr_type: int, payload: bytes) -> bytes:
+    """Pack a netlink attribute, padded to 4 bytes."""
+    length = _NLATTR.size + len(payload)
+    return _NLATTR.pack(length, attr_type) + payload + b"\0" * (-length & 3)
+
+
+def _parse_attrs(data: bytes) -> Dict[int, bytes]:
+    """Parse a run of netlink attributes into {type: payload}."""
+    attrs = {}
+    offset = 0
+    while offset + _NLATTR.size <= len(data):
+        length, attr_type = _NLATTR.unpack_from(data, offset)
+        if length < _NLATTR.size:
+            break
+        # Strip NLA_F_NESTED / NLA_F_NET_BYTEORDER flags
+        attrs[attr_type & 0x3FFF] = data[offset + _NLATTR.size:offset + length]
+        offset += (length + 3) & ~3
+    return attrs
+
+
+class Nl80211Client:
+    """
+    Minimal nl80211 client over a generic netlink socket.
+
+    The socket and the resolved nl80211 family id are kept open for the life of
+    the object, so each query is a single request/response on an open socket.
+    """
+
+    def __init__(self):
+        try:
+            self.sock = socket.socket(socket.AF_NETLINK, socket.SOCK_RAW, NETLINK_GENERIC)
+            self.sock.bind((0, 0))
+        except (AttributeError, OSError) as e:
+            raise WirelessError(f"Generic netlink unavailable: {e}")
+        self.sock.settimeout(1.0)
+        self._seq = 0
+        self.family_id = self._resolve_family("nl80211")
+
+    def close(self) -> None:
+        self.sock.close()
+
+    def _request(self, msg_type: int, cmd: int, attrs: bytes) -> List[Dict[int, bytes]]:
+        """Send one generic netlink request and collect the attribute sets of the replies."""
+        self._seq += 1
+        payload = _GENLMSGHDR.pack(cmd, 1, 0) + attrs
+        header = _NLMSGHDR.pack(_NLMSGHDR.size + len(payload), msg_type, NLM_F_REQUEST | NLM_F_ACK, self._seq, 0)
+        self.sock.send(header + payload)
+
+        replies = []
+        while True:
+            data = self.sock.recv(65536)
+            offset = 0
+            while offset + _NLMSGHDR.size <= len(data):
+                length, reply_type, _, seq, _ = _NLMSGHDR.unpack_from(data, offset)
+                if length < _NLMSGHDR.size:
+                    return replies
+                body = data[offset + _NLMSGHDR.size:offset + length]
+                offset += (length + 3) & ~3
+                if seq != self._seq:
+                    continue
+                if reply_type == NLMSG_ERROR:
+                    error = struct.unpack_from("=i", body)[0]
+                    if error:
+                        raise WirelessError(-error, os.strerror(-error))
+                    return replies  # ACK
+                if reply_type == NLMSG_DONE:
+                    return replies
+                replies.append(_parse_attrs(body[_GENLMSGHDR.size:]))
+
+    def _resolve_family(self, name: str) -> int:
+        """Look up the numeric id of a generic netlink family."""
+        replies = self._request(GENL_ID_CTRL, CTRL_CMD_GETFAMILY,
+                                _pack_attr(CTRL_ATTR_FAMILY_NAME, name.encode() + b"\0"))
+        for attrs in replies:
+            if CTRL_ATTR_FAMILY_ID in attrs:
+                return struct.unpack("=H", attrs[CTRL_ATTR_FAMILY_ID][:2])[0]
+        raise WirelessError(f"Generic netlink family {name} not found")
+
+    def get_ssid(self, ifname: str) -> Optional[str]:
+        """Get the SSID the interface is associated with, or None."""
+        ifindex = socket.if_nametoindex(ifname)
+        replies = self._request(self.family_id, NL80211_CMD_GET_INTERFACE,
+                                _pack_attr(NL80211_ATTR_IFINDEX, struct.pack("=I", ifindex)))
+        for attrs in replies:
+            ssid = attrs.get(NL80211_ATTR_SSID)
+            if ssid:
+                return ssid.decode("utf-8", errors="replace")
+        return None
+
+
+def open_link_monitor() -> socket.socket:
+    """
+    Open an rtnetlink socket subscribed to link change notifications.
+
+    The kernel sends RTM_NEWLINK/RTM_DELLINK messages on it whenever an
+    interface goes up or down or (for WiFi) associates with a new network.
+
+    Raises:
+        WirelessError: If rtnetlink is not available
+    """
+    try:
+        sock = socket.socket(socket.AF_NETLINK, socket.SOCK_RAW, NETLINK_ROUTE)
+        sock.bind((0, RTMGRP_LINK))
+    except (AttributeError, OSError) as e:
+        raise WirelessError(f"rtnetlink unavailable: {e}")
+    return sock
+
+
+def parse_link_events(data: bytes) -> List[Tuple[str, bool]]:
+    """
+    Parse link notifications read from a link monitor socket.
+
+    Returns:
+        List of (interface name, link is up) tuples
+    """
+    events = []
+    offset = 0
+    while offset + _NLMSGHDR.size <= len(data):
+        length, msg_type, _, _, _ = _NLMSGHDR.unpack_from(data, offset)
+        if length < _NLMSGHDR.size:
+            break
+        if msg_type in (RTM_NEWLINK, RTM_DELLINK):
+            body = data[offset + _NLMSGHDR.size:offset + length]
+            _, _, ifindex, flags, _ = _IFINFOMSG.unpack_from(body)
+            attrs = _parse_attrs(body[_IFINFOMSG.size:])
+            ifname = attrs.get(IFLA_IFNAME, b"").rstrip(b"\0").decode(errors="replace") or str(ifindex)
+            events.append((ifname, msg_type == RTM_NEWLINK and bool(flags & IFF_LOWER_UP)))
+        offset += (length + 3) & ~3
+    return events
+
+
+def _iwreq(ifname: str, buffer_addr: int = 0, length: int = 0) -> bytes:
+    """Build a struct iwreq carrying an iw_point (pointer, length, flags)."""
+    req = struct.pack(f"{IFNAMSIZ}sPHH", ifname.encode()[:IFNAMSIZ - 1], buffer_addr, length, 0)
+    return req.ljust(IWREQ_SIZE, b"\0")
+
+
+def get_ssid_wext(ifname: str) -> Optional[str]:
+    """Get the SSID via the SIOCGIWESSID Wireless Extensions ioctl."""
+    buf = array.array("B", bytes(IW_ESSID_MAX_SIZE + 1))
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as s:
+        result = fcntl.ioctl(s.fileno(), SIOCGIWESSID, _iwreq(ifname, buf.buffer_info()[0], len(buf)))
+    length = struct.unpack_from("H", result, IFNAMSIZ + struct.calcsize("P"))[0]
+    ssid = buf.tobytes()[:min(length, IW_ESSID_MAX_SIZE)].rstrip(b"\0")
+    return ssid.decode("utf-8", errors="replace") if ssid else None
+
+
+def get_bssid_wext(ifname: str) -> Optional[str]:
+    """Get the BSSID of the associated access point via the SIOCGIWAP ioctl."""
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as s:
+        result = fcntl.ioctl(s.fileno(), SIOCGIWAP, _iwreq(ifname))
+    # iwreq_data holds a struct sockaddr: sa_family (2 bytes) then the MAC
+    mac = result[IFNAMSIZ + 2:IFNAMSIZ + 8]
+    if mac in (b"\0" * 6, b"\xff" * 6, b"\x44" * 6):
+        return None  # Not associated
+    return ":".join(f"{b:02x}" for b in mac)
+
+
+class LinuxWirelessReader:
+    """
+    Reads association state from the kernel without spawning processes.
+
+    Tries nl80211 first, then Wireless Extensions, and remembers which one
+    works so later calls go straight to it.
+    """
+
+    def __init__(self):
+        self._nl80211: Optional[Nl80211Client] = None
+        self._backend: Optional[str] = None
+
+    def _ssid_nl80211(self, ifname: str) -> Optional[str]:
+        if self._nl80211 is None:
+            self._nl80211 = Nl80211Client()
+        return self._nl80211.get_ssid(ifname)
+
+    def get_ssid(self) -> Optional[str]:
+        """
+        Get the SSID of the first associated wireless interface.
+
+        Returns:
+            SSID, or None if no wireless interface is associated
+
+        Raises:
+            WirelessError: If neither kernel interface can be used
+        """
+        interfaces = list_wireless_interfaces()
+        if not interfaces:
+            raise WirelessError("No wireless interfaces found in sysfs")
+
+        backends = [("nl80211", self._ssid_nl80211), ("wext", get_ssid_wext)]
+        if self._backend:
+            backends.sort(key=lambda backend: backend[0] != self._backend)
+
+        errors = []
+        for name, query in backends:
+            try:
+                ssids = [query(ifname) for ifname in interfaces]
+            except (OSError, struct.error) as e:
+                errors.append(f"{name}: {e}")
+                continue
+            if self._backend != name:
+                logger.debug(f"Using {name} for native SSID detection")
+                self._backend = name
+            return next((ssid for ssid in ssids if ssid), None)
+        raise WirelessError("; ".join(errors))
+
+    def get_bssid(self) -> Optional[str]:
+        """Get the BSSID of the first associated wireless interface, or None."""
+        for ifname in list_wireless_interfaces():
+            bssid = get_bssid_wext(ifname)
+            if bssid:
+                return bssid
+        return None
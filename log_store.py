@@ -0,0 +1,634 @@
+"""
+Login attempt storage for WiFi Auto Auth.
+Keeps one long-lived SQLite connection per database file and process, in WAL
+mode so the CLI/daemon can write while the dashboard reads, and brings the
+schema up to date with versioned migrations when the database is opened.
+Login attempts are written behind the caller's back by a background thread.
+"""
+
+import atexit
+import datetime
+import os
+import pathlib
+import queue
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from config.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+DEFAULT_DB_NAME = "wifi_log.db"
+BUSY_TIMEOUT_MS = 5000  # wait this long for another process's write lock
+SYNCHRONOUS = "NORMAL"  # in WAL mode only checkpoints fsync; commits stay durable to crashes
+CACHED_STATEMENTS = 256  # prepared statements kept per connection, keyed on SQL text
+WRITE_BATCH_SIZE = 100  # queued attempts written in one transaction at most
+WRITE_FLUSH_INTERVAL = 1.0  # seconds a queued attempt may wait for more to batch with
+WRITE_RETRIES = 5  # retries of a batch that hit a locked database before it is dropped
+WRITE_RETRY_DELAY = 0.5  # seconds before the first retry; doubles after each one
+READ_POOL_SIZE = 4  # read-only connections per ReadPool
+
+ATTEMPT_COLUMNS = (
+    "timestamp", "network_name", "network_ssid", "username", "password",
+    "a", "response_status", "response_message", "reason",
+)
+INSERT_ATTEMPT_SQL = (
+    f"INSERT INTO login_attempts ({', '.join(ATTEMPT_COLUMNS)}) "
+    f"VALUES ({', '.join('?' for _ in ATTEMPT_COLUMNS)})"
+)
+
+HOUR = 3600
+# Epoch hour of an attempt, in SQL. Queries must spell it exactly like this
+# to use the idx_attempts_hour expression index.
+HOUR_SQL = f"(timestamp / {HOUR})"
+
+# UPSERT (used by the counters trigger and retention) needs SQLite 3.24
+MIN_SQLITE_VERSION = (3, 24, 0)
+
+
+def now_epoch() -> int:
+    """Current time as integer epoch seconds (UTC), the stored timestamp format."""
+    return int(time.time())
+
+
+def to_epoch(value) -> int:
+    """
+    Convert a user-supplied time to epoch seconds.
+
+    Accepts epoch numbers or ISO 8601 strings such as "2024-05-01",
+    "2024-05-01 13:45:00" or the "2024-05-01T13:45" sent by datetime-local
+    inputs; naive values are taken as local time.
+
+    Raises:
+        ValueError: If the value cannot be parsed
+    """
+    if isinstance(value, (int, float)):
+        return int(value)
+    text = str(value).strip()
+    try:
+        return int(float(text))
+    except ValueError:
+        return int(datetime.datetime.fromisoformat(text).timestamp())
+
+
+def format_timestamp(epoch: Optional[int]) -> Optional[str]:
+    """Format a stored timestamp as local "YYYY-MM-DD HH:MM:SS" for display."""
+    if epoch is None:
+        return None
+    # isoformat is about twice as fast as strftime, which adds up over large pages
+    return datetime.datetime.fromtimestamp(epoch).isoformat(" ", "seconds")
+
+
+def check_sqlite_version() -> None:
+    """
+    Fail early, with a clear message, on an SQLite library that is too old.
+
+    Raises:
+        RuntimeError: If the SQLite linked into Python is older than MIN_SQLITE_VERSION
+    """
+    if sqlite3.sqlite_version_info < MIN_SQLITE_VERSION:
+        required = ".".join(map(str, MIN_SQLITE_VERSION))
+        raise RuntimeError(
+            f"SQLite {sqlite3.sqlite_version} is too old: the login database needs SQLite {required} "
+            f"or newer. Upgrade the system SQLite library or use a Python built against a newer one."
+        )
+
+
+def _migrate_login_attempts(conn: sqlite3.Connection) -> None:
+    """Version 1: the login_attempts table with network columns."""
+    # Databases from before versioning may already have the table, with or
+    # without the network columns
+    columns = [row[1] for row in conn.execute("PRAGMA table_info(login_attempts)")]
+    if not columns:
+        conn.execute("""
+            CREATE TABLE login_attempts (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                timestamp TEXT,
+                network_name TEXT,
+                network_ssid TEXT,
+                username TEXT,
+                password TEXT,
+                a TEXT,
+                response_status TEXT,
+                response_message TEXT
+            )
+        """)
+        logger.info("Created new login_attempts table with network support")
+        return
+    if "network_name" not in columns:
+        conn.execute("ALTER TABLE login_attempts ADD COLUMN network_name TEXT")
+        logger.info("Added network_name column to existing table")
+    if "network_ssid" not in columns:
+        conn.execute("ALTER TABLE login_attempts ADD COLUMN network_ssid TEXT")
+        logger.info("Added network_ssid column to existing table")
+
+
+def _migrate_attempt_indexes(conn: sqlite3.Connection) -> None:
+    """Version 2: indexes for time ordering and network/status filters."""
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_attempts_timestamp ON login_attempts (timestamp)")
+    # Also serves "WHERE network_name = ? ORDER BY timestamp"
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_attempts_network ON login_attempts (network_name, timestamp)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_attempts_status ON login_attempts (response_status)")
+
+
+def _migrate_session_lifetimes(conn: sqlite3.Connection) -> None:
+    """Version 3: observed portal session lifetimes (see session_scheduler)."""
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS session_lifetimes (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            network_name TEXT,
+            observed_at INTEGER,
+            lifetime REAL
+        )
+    """)
+
+
+def _migrate_epoch_timestamps(conn: sqlite3.Connection) -> None:
+    """
+    Version 4: integer epoch timestamps plus an index on the hour bucket.
+
+    Text timestamps were written in local time by datetime.now(); they are
+    converted to UTC epoch seconds. The column's type changes, so the table
+    is rebuilt (ids are kept). The hour is indexed as an expression on
+    HOUR_SQL, with the status, so hourly charts and retention are answered
+    from the index alone.
+    """
+    conn.execute("""
+        CREATE TABLE login_attempts_new (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            timestamp INTEGER NOT NULL,
+            network_name TEXT,
+            network_ssid TEXT,
+            username TEXT,
+            password TEXT,
+            a TEXT,
+            response_status TEXT,
+            response_message TEXT
+        )
+    """)
+    conn.execute("""
+        INSERT INTO login_attempts_new (id, timestamp, network_name, network_ssid, username,
+                                        password, a, response_status, response_message)
+        SELECT id, COALESCE(CAST(strftime('%s', timestamp, 'utc') AS INTEGER), 0),
+               network_name, network_ssid, username, password, a, response_status, response_message
+        FROM login_attempts
+    """)
+    conn.execute("DROP TABLE login_attempts")
+    conn.execute("ALTER TABLE login_attempts_new RENAME TO login_attempts")
+    conn.execute("CREATE INDEX idx_attempts_timestamp ON login_attempts (timestamp)")
+    conn.execute("CREATE INDEX idx_attempts_network ON login_attempts (network_name, timestamp)")
+    conn.execute("CREATE INDEX idx_attempts_status ON login_attempts (response_status)")
+    conn.execute(f"CREATE INDEX idx_attempts_hour ON login_attempts ({HOUR_SQL}, response_status)")
+
+
+def _migrate_attempt_rollups(conn: sqlite3.Connection) -> None:
+    """
+    Version 5: hourly rollups of pruned attempts (see retention).
+
+    NULL network names/SSIDs are stored as '' so they take part in the
+    primary key used to merge rollups.
+    """
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS attempt_rollups (
+            hour INTEGER NOT NULL,
+            network_name TEXT NOT NULL DEFAULT '',
+            network_ssid TEXT NOT NULL DEFAULT '',
+            total INTEGER NOT NULL,
+            success INTEGER NOT NULL,
+            last_attempt INTEGER,
+            PRIMARY KEY (hour, network_name, network_ssid)
+        ) WITHOUT ROWID
+    """)
+
+
+def _migrate_attempt_counters(conn: sqlite3.Connection) -> None:
+    """
+    Version 6: running totals for the dashboard, kept up to date by a trigger.
+
+    One row with scope 'all' holds the global totals and one row per
+    (network, SSID) with scope 'network' the per-network totals, so stats are
+    primary-key lookups instead of scans. Counters include attempts later
+    pruned by retention; only clear_logs() resets them.
+    """
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS attempt_counters (
+            scope TEXT NOT NULL,
+            network_name TEXT NOT NULL DEFAULT '',
+            network_ssid TEXT NOT NULL DEFAULT '',
+            total INTEGER NOT NULL,
+            success INTEGER NOT NULL,
+            last_attempt INTEGER,
+            PRIMARY KEY (scope, network_name, network_ssid)
+        ) WITHOUT ROWID
+    """)
+    conn.execute("DELETE FROM attempt_counters")
+    # Backfill from existing raw attempts and rollups
+    conn.execute("""
+        INSERT INTO attempt_counters (scope, network_name, network_ssid, total, success, last_attempt)
+        SELECT 'network', network_name, network_ssid, SUM(total), SUM(success), MAX(last_attempt)
+        FROM (
+            SELECT IFNULL(network_name, '') AS network_name, IFNULL(network_ssid, '') AS network_ssid,
+                   COUNT(*) AS total, SUM(response_status = '200') AS success, MAX(timestamp) AS last_attempt
+            FROM login_attempts GROUP BY 1, 2
+            UNION ALL
+            SELECT network_name, network_ssid, SUM(total), SUM(success), MAX(last_attempt)
+            FROM attempt_rollups GROUP BY 1, 2
+        )
+        GROUP BY network_name, network_ssid
+    """)
+    conn.execute("""
+        INSERT INTO attempt_counters (scope, network_name, network_ssid, total, success, last_attempt)
+        SELECT 'all', '', '', SUM(total), SUM(success), MAX(last_attempt)
+        FROM attempt_counters WHERE scope = 'network'
+        HAVING COUNT(*) > 0
+    """)
+    conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS trg_attempt_counters AFTER INSERT ON login_attempts
+        BEGIN
+            INSERT INTO attempt_counters (scope, network_name, network_ssid, total, success, last_attempt)
+            VALUES ('all', '', '', 1, NEW.response_status = '200', NEW.timestamp),
+                   ('network', IFNULL(NEW.network_name, ''), IFNULL(NEW.network_ssid, ''), 1,
+                    NEW.response_status = '200', NEW.timestamp)
+            ON CONFLICT (scope, network_name, network_ssid) DO UPDATE SET
+                total = total + 1,
+                success = success + excluded.success,
+                last_attempt = MAX(last_attempt, excluded.last_attempt);
+        END
+    """)
+
+
+def _migrate_attempt_reason(conn: sqlite3.Connection) -> None:
+    """
+    Version 7: why a login was sent, NULL for an ordinary one.
+
+    The daemon's proactive re-logins are tagged so the session scheduler can
+    leave them out when it learns session lifetimes from login gaps.
+    """
+    conn.execute("ALTER TABLE login_attempts ADD COLUMN reason TEXT")
+
+
+# Migration n (1-based) upgrades a database from user_version n-1 to n.
+# Append new migrations; never edit or reorder released ones.
+MIGRATIONS: List[Callable[[sqlite3.Connection], None]] = [
+    _migrate_login_attempts,
+    _migrate_attempt_indexes,
+    _migrate_session_lifetimes,
+    _migrate_epoch_timestamps,
+    _migrate_attempt_rollups,
+    _migrate_attempt_counters,
+    _migrate_attempt_reason,
+]
+SCHEMA_VERSION = len(MIGRATIONS)
+
+
+class AttemptWriter(threading.Thread):
+    """
+    Background thread that writes queued login attempts in batches.
+
+    A batch is written when it reaches ``batch_size`` attempts or its oldest
+    attempt has waited ``flush_interval`` seconds, whichever comes first.
+    A batch that finds the database locked is retried with backoff, so
+    attempts queue up behind it rather than being lost.
+    ``flush()`` writes everything queued so far and waits for it; ``stop()``
+    does the same and ends the thread.
+    """
+
+    _FLUSH = object()
+    _STOP = object()
+
+    def __init__(self, store: "LogStore", batch_size: int = WRITE_BATCH_SIZE,
+                 flush_interval: float = WRITE_FLUSH_INTERVAL):
+        super().__init__(name="attempt-writer", daemon=True)
+        self.store = store
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+        self._queue: "queue.Queue" = queue.Queue()
+        # Attempts submitted but not yet written (or dropped)
+        self.pending = 0
+        self._idle = threading.Condition()
+
+    def submit(self, record: Sequence) -> None:
+        """Queue one attempt for writing; returns immediately."""
+        with self._idle:
+            self.pending += 1
+        self._queue.put(record)
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Write all queued attempts now and wait until they are on disk."""
+        if not self.is_alive():
+            return self.pending == 0
+        self._queue.put(self._FLUSH)
+        with self._idle:
+            return self._idle.wait_for(lambda: self.pending == 0, timeout)
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """Write everything still queued, then end the thread."""
+        if self.is_alive():
+            self._queue.put(self._STOP)
+            self.join(timeout)
+
+    def run(self) -> None:
+        stopping = False
+        while not stopping:
+            item = self._queue.get()
+            batch = []
+            deadline = time.monotonic() + self.flush_interval
+            while True:
+                if item is self._STOP:
+                    stopping = True
+                    break
+                if item is self._FLUSH:
+                    break
+                batch.append(item)
+                if len(batch) >= self.batch_size:
+                    break
+                try:
+                    item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+            if batch:
+                self._write(batch)
+
+    def _write(self, batch: List[Sequence]) -> None:
+        """
+        Write one batch, retrying with backoff while the database is locked.
+
+        Another process (retention, a VACUUM) can hold the write lock past
+        the busy timeout; the batch is only dropped after WRITE_RETRIES
+        retries, or at once on any other database error.
+        """
+        try:
+            for retry in range(WRITE_RETRIES + 1):
+                try:
+                    self.store.insert_attempts(batch)
+                    logger.debug(f"Wrote {len(batch)} queued login attempt(s)")
+                    return
+                except sqlite3.OperationalError as e:
+                    if retry == WRITE_RETRIES:
+                        raise
+                    delay = WRITE_RETRY_DELAY * 2 ** retry
+                    logger.warning(f"Could not write {len(batch)} login attempt(s) ({e}), retrying in {delay:.1f}s")
+                    time.sleep(delay)
+        except sqlite3.Error as e:
+            logger.error(f"Failed to write login attempts, {len(batch)} row(s) lost: {e}")
+        finally:
+            with self._idle:
+                self.pending -= len(batch)
+                self._idle.notify_all()
+
+
+class LogStore:
+    """
+    A persistent connection to the login attempt database.
+
+    The connection runs in autocommit mode; ``transaction()`` groups several
+    statements into one commit. All access goes through a re-entrant lock, so
+    one store can be shared by every thread in the process.
+
+    ``submit_attempt()`` hands attempts to an AttemptWriter so callers never
+    wait for the disk. Queries and statements on the store flush queued
+    attempts first, so the process always reads its own writes.
+    """
+
+    def __init__(self, path: str = DEFAULT_DB_NAME):
+        check_sqlite_version()
+        self.path = path
+        self._lock = threading.RLock()
+        self._depth = 0
+        self._txn_thread: Optional[int] = None
+        self._writer: Optional[AttemptWriter] = None
+        self.conn = sqlite3.connect(
+            path,
+            timeout=BUSY_TIMEOUT_MS / 1000,
+            isolation_level=None,
+            check_same_thread=False,
+            cached_statements=CACHED_STATEMENTS,
+        )
+        self._configure()
+        self._migrate()
+
+    def _configure(self) -> None:
+        """Switch to WAL and set the lock timeout and sync level."""
+        # Only takes effect on a new, empty database (so it must come before
+        # the switch to WAL); --apply-retention converts existing ones with a VACUUM
+        self.conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+        mode = self.conn.execute("PRAGMA journal_mode=WAL").fetchone()[0]
+        if mode.lower() != "wal":
+            logger.warning(f"Could not enable WAL on {self.path} (journal mode is {mode})")
+        self.conn.execute(f"PRAGMA busy_timeout={BUSY_TIMEOUT_MS}")
+        self.conn.execute(f"PRAGMA synchronous={SYNCHRONOUS}")
+
+    def _migrate(self) -> None:
+        """Apply pending migrations, tracked in PRAGMA user_version."""
+        if self.query_one("PRAGMA user_version")[0] >= SCHEMA_VERSION:
+            return
+        with self.transaction() as conn:
+            # Re-read under the write lock in case another process just migrated
+            version = conn.execute("PRAGMA user_version").fetchone()[0]
+            for number, migration in enumerate(MIGRATIONS[version:], start=version + 1):
+                migration(conn)
+                logger.debug(f"Applied database migration {number}: {migration.__name__}")
+            if version < SCHEMA_VERSION:
+                conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+                logger.info(f"Database schema upgraded from version {version} to {SCHEMA_VERSION}")
+
+    @contextmanager
+    def transaction(self) -> Iterator[sqlite3.Connection]:
+        """
+        Run the enclosed statements in a single transaction (one commit).
+
+        Nested calls join the outer transaction. The store is locked for the
+        duration, so keep the block short.
+        """
+        with self._lock:
+            if self._depth:
+                self._depth += 1
+                try:
+                    yield self.conn
+                finally:
+                    self._depth -= 1
+                return
+
+            self.conn.execute("BEGIN IMMEDIATE")
+            self._depth = 1
+            self._txn_thread = threading.get_ident()
+            try:
+                yield self.conn
+            except BaseException:
+                self.conn.execute("ROLLBACK")
+                raise
+            else:
+                self.conn.execute("COMMIT")
+            finally:
+                self._depth = 0
+                self._txn_thread = None
+
+    def _sync_writes(self) -> None:
+        """Flush queued attempts before a read or write, unless that would self-deadlock."""
+        writer = self._writer
+        if writer and writer.pending and self._txn_thread != threading.get_ident() \
+                and threading.current_thread() is not writer:
+            writer.flush()
+
+    def execute(self, sql: str, params: Sequence = ()) -> sqlite3.Cursor:
+        """Run one statement (committed on its own unless inside transaction())."""
+        self._sync_writes()
+        with self._lock:
+            return self.conn.execute(sql, params)
+
+    def query(self, sql: str, params: Sequence = ()) -> List[Tuple]:
+        """Run a query and return all rows."""
+        self._sync_writes()
+        with self._lock:
+            return self.conn.execute(sql, params).fetchall()
+
+    def query_one(self, sql: str, params: Sequence = ()) -> Optional[Tuple]:
+        """Run a query and return its first row, or None."""
+        self._sync_writes()
+        with self._lock:
+            return self.conn.execute(sql, params).fetchone()
+
+    def insert_attempt(self, record: Sequence) -> None:
+        """Insert one login attempt; ``record`` follows ATTEMPT_COLUMNS."""
+        self.execute(INSERT_ATTEMPT_SQL, record)
+
+    def insert_attempts(self, records: Iterable[Sequence]) -> None:
+        """Insert many login attempts in a single transaction."""
+        with self.transaction() as conn:
+            conn.executemany(INSERT_ATTEMPT_SQL, records)
+
+    def clear_attempts(self) -> None:
+        """Delete all login history: raw attempts, rollups and counters."""
+        self._sync_writes()
+        with self.transaction() as conn:
+            conn.execute("DELETE FROM login_attempts")
+            conn.execute("DELETE FROM attempt_rollups")
+            conn.execute("DELETE FROM attempt_counters")
+
+    def submit_attempt(self, record: Sequence) -> None:
+        """Queue a login attempt to be written in the background."""
+        with self._lock:
+            if self._writer is None:
+                self._writer = AttemptWriter(self)
+                self._writer.start()
+        self._writer.submit(record)
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Write queued login attempts now; returns False on timeout."""
+        return self._writer.flush(timeout) if self._writer else True
+
+    def close(self) -> None:
+        """Write queued attempts and close the connection."""
+        if self._writer:
+            self._writer.stop()
+            self._writer = None
+        with self._lock:
+            self.conn.close()
+
+
+class ReadPool:
+    """
+    A bounded pool of read-only connections to the login attempt database.
+
+    Each query borrows a connection for its duration, so up to ``size``
+    threads read concurrently instead of queueing on the LogStore lock; in
+    WAL mode they never block (or are blocked by) the writer. Connections
+    are opened with ``mode=ro`` and cannot modify the database, which must
+    already exist and be migrated (open it once with get_store() first).
+    """
+
+    def __init__(self, path: str = DEFAULT_DB_NAME, size: int = READ_POOL_SIZE):
+        self.path = path
+        self.size = max(1, int(size))
+        self._idle: "queue.LifoQueue[sqlite3.Connection]" = queue.LifoQueue()
+        self._opened = 0
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        uri = pathlib.Path(os.path.abspath(self.path)).as_uri() + "?mode=ro"
+        conn = sqlite3.connect(
+            uri,
+            uri=True,
+            timeout=BUSY_TIMEOUT_MS / 1000,
+            isolation_level=None,
+            check_same_thread=False,
+            cached_statements=CACHED_STATEMENTS,
+        )
+        conn.execute(f"PRAGMA busy_timeout={BUSY_TIMEOUT_MS}")
+        return conn
+
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        """Borrow a connection, opening one if fewer than ``size`` exist, else wait for one."""
+        try:
+            conn = self._idle.get_nowait()
+        except queue.Empty:
+            with self._lock:
+                grow = self._opened < self.size
+                if grow:
+                    self._opened += 1
+            if grow:
+                try:
+                    conn = self._connect()
+                except BaseException:
+                    with self._lock:
+                        self._opened -= 1
+                    raise
+            else:
+                conn = self._idle.get()
+        try:
+            yield conn
+        finally:
+            self._idle.put(conn)
+
+    def query(self, sql: str, params: Sequence = ()) -> List[Tuple]:
+        """Run a query and return all rows."""
+        with self.connection() as conn:
+            return conn.execute(sql, params).fetchall()
+
+    def query_one(self, sql: str, params: Sequence = ()) -> Optional[Tuple]:
+        """Run a query and return its first row, or None."""
+        with self.connection() as conn:
+            return conn.execute(sql, params).fetchone()
+
+    def close(self) -> None:
+        """Close idle connections (call once no queries are running)."""
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            conn.close()
+            with self._lock:
+                self._opened -= 1
+
+
+# Process-wide stores keyed on database path, used by get_store()
+_stores: Dict[str, LogStore] = {}
+_stores_lock = threading.Lock()
+
+
+def get_store(path: str = DEFAULT_DB_NAME) -> LogStore:
+    """Get the shared store for a database file, opening it on first use."""
+    with _stores_lock:
+        store = _stores.get(path)
+        if store is None:
+            store = LogStore(path)
+            _stores[path] = store
+        return store
+
+
+def close_stores() -> None:
+    """Close all shared stores, writing queued attempts first (call on shutdown)."""
+    with _stores_lock:
+        for store in _stores.values():
+            store.close()
+        _stores.clear()
+
+
+# Queued attempts must reach the database on every clean exit
+atexit.register(close_stores)
+
@@ -6,140 +6,294 @@ Handles network detection, SSID identification, and network profile management.
 import subprocess
 import platform
 import re
-import json
-import os
-from typing import Optional, Dict, List, Tuple
+import fnmatch
+import select
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed, TimeoutError as FuturesTimeout
+from typing import Optional, Dict, List, Tuple, Callable
+from config.config_cache import get_config
 from config.logging_config import get_logger
 
 logger = get_logger(__name__)
 
 class NetworkDetector:
-    """Handles network detection and SSID identification across different platforms."""
+    """
+    Handles network detection and SSID identification across different platforms.
     
-    def __init__(self):
+    Command-line backends run concurrently under an overall time budget
+    (``timeout``): the first one to report an SSID wins and the others are
+    killed. The result is memoized process-wide for ``cache_ttl`` seconds, so
+    several lookups in the same run detect only once.
+    """
+    
+    DEFAULT_TIMEOUT = 2.0
+    DEFAULT_CACHE_TTL = 2.0
+    
+    # Shared by all detectors in the process: command-line tools found to be
+    # missing, the native kernel reader, the memoized SSID and the child
+    # processes of the detection in progress
+    _missing_tools: set = set()
+    _native_reader = None
+    _ssid_cache: Optional[Tuple[float, Optional[str]]] = None
+    _detect_lock = threading.RLock()
+    _procs: set = set()
+    _procs_lock = threading.Lock()
+    
+    def __init__(self, timeout: float = DEFAULT_TIMEOUT, cache_ttl: float = DEFAULT_CACHE_TTL):
         self.platform = platform.system().lower()
+        self.timeout = timeout
+        self.cache_ttl = cache_ttl
         logger.debug(f"Initialized NetworkDetector for platform: {self.platform}")
     
-    def get_current_ssid(self) -> Optional[str]:
+    def get_current_ssid(self, use_cache: bool = True) -> Optional[str]:
         """
         Get the SSID of the currently connected WiFi network.
         
+        Args:
+            use_cache: Return the memoized SSID if it is younger than cache_ttl
+        
         Returns:
             str: SSID of current network, or None if not connected to WiFi
         """
+        with NetworkDetector._detect_lock:
+            cached = NetworkDetector._ssid_cache
+            if use_cache and cached and time.monotonic() - cached[0] < self.cache_ttl:
+                return cached[1]
+            
+            try:
+                ssid = self._detect_ssid()
+            except Exception as e:
+                logger.error(f"Failed to get current SSID: {e}")
+                ssid = None
+            NetworkDetector._ssid_cache = (time.monotonic(), ssid)
+            return ssid
+    
+    def _detect_ssid(self) -> Optional[str]:
+        """Detect the SSID using the fastest available backends for this platform."""
+        if self.platform == "windows":
+            backends = [self._windows_netsh]
+        elif self.platform == "darwin":  # macOS
+            backends = [self._macos_networksetup, self._macos_airport]
+        elif self.platform == "linux":
+            return self._get_ssid_linux()
+        else:
+            logger.warning(f"Unsupported platform: {self.platform}")
+            return None
+        
+        ssid = self._race(backends)
+        if not ssid:
+            logger.debug(f"No active WiFi connection found on {self.platform}")
+        return ssid
+    
+    def _race(self, backends: List[Callable[[], Optional[str]]]) -> Optional[str]:
+        """
+        Run detection backends concurrently and return the first SSID found.
+        
+        Backends still running when an answer arrives or the time budget runs
+        out are cancelled and their child processes killed.
+        """
+        if not backends:
+            return None
+        
+        executor = ThreadPoolExecutor(max_workers=len(backends), thread_name_prefix="ssid")
+        futures = {executor.submit(backend): backend.__name__ for backend in backends}
+        try:
+            for future in as_completed(futures, timeout=self.timeout):
+                name = futures[future]
+                try:
+                    ssid = future.result()
+                except FileNotFoundError as e:
+                    # Tool not installed; never spawn it again
+                    logger.debug(f"Detection method {name} unavailable: {e}")
+                    NetworkDetector._missing_tools.add(name)
+                except Exception as e:
+                    logger.debug(f"Detection method {name} failed: {e}")
+                else:
+                    if ssid:
+                        logger.debug(f"Detected SSID via {name}: {ssid}")
+                        return ssid
+        except FuturesTimeout:
+            logger.warning(f"SSID detection timed out after {self.timeout}s")
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+            self._kill_running()
+        return None
+    
+    def _run(self, cmd: List[str]) -> str:
+        """Run a detection command within the time budget and return its stdout."""
+        proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+        with NetworkDetector._procs_lock:
+            NetworkDetector._procs.add(proc)
+        try:
+            stdout, stderr = proc.communicate(timeout=self.timeout)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+            proc.communicate()
+            raise
+        finally:
+            with NetworkDetector._procs_lock:
+                NetworkDetector._procs.discard(proc)
+        if proc.returncode:
+            raise subprocess.CalledProcessError(proc.returncode, cmd, stdout, stderr)
+        return stdout
+    
+    @classmethod
+    def _kill_running(cls) -> None:
+        """Kill detection commands that are still running."""
+        with cls._procs_lock:
+            for proc in cls._procs:
+                if proc.poll() is None:
+                    proc.kill()
+    
+    def get_current_bssid(self) -> Optional[str]:
+        """
+        Get the BSSID (access point MAC address) of the current WiFi network.
+        
+        Returns:
+            str: Lower-case BSSID like "aa:bb:cc:dd:ee:ff", or None if unknown
+        """
         try:
             if self.platform == "windows":
-                return self._get_ssid_windows()
-            elif self.platform == "darwin":  # macOS
-                return self._get_ssid_macos()
+                cmd = ["netsh", "wlan", "show", "interfaces"]
+                pattern = r'BSSID\s*:\s*([0-9A-Fa-f:]{17})'
+            elif self.platform == "darwin":
+                cmd = ["/System/Library/PrivateFrameworks/Apple80211.framework/Versions/Current/Resources/airport", "-I"]
+                pattern = r'BSSID:\s*([0-9A-Fa-f:]{11,17})'
             elif self.platform == "linux":
-                return self._get_ssid_linux()
+                try:
+                    return self._get_native_reader().get_bssid()
+                except Exception as e:
+                    logger.debug(f"Native BSSID detection failed: {e}")
+                cmd = ["iwgetid", "-a", "-r"]
+                pattern = r'([0-9A-Fa-f:]{17})'
             else:
-                logger.warning(f"Unsupported platform: {self.platform}")
                 return None
-        except Exception as e:
-            logger.error(f"Failed to get current SSID: {e}")
-            return None
-    
-    def _get_ssid_windows(self) -> Optional[str]:
-        """Get SSID on Windows using netsh command."""
-        try:
-            # Use netsh to get WiFi profile information
-            cmd = ["netsh", "wlan", "show", "profiles"]
-            result = subprocess.run(cmd, capture_output=True, text=True, check=True)
-            
-            # Get the currently connected profile
-            cmd_interfaces = ["netsh", "wlan", "show", "interfaces"]
-            interfaces_result = subprocess.run(cmd_interfaces, capture_output=True, text=True, check=True)
-            
-            # Parse the SSID from the interfaces output
-            for line in interfaces_result.stdout.split('\n'):
-                if 'SSID' in line and 'BSSID' not in line:
-                    # Extract SSID (format: "    SSID                   : NetworkName")
-                    match = re.search(r'SSID\s*:\s*(.+)', line.strip())
-                    if match:
-                        ssid = match.group(1).strip()
-                        logger.debug(f"Detected Windows SSID: {ssid}")
-                        return ssid
-            
-            logger.debug("No active WiFi connection found on Windows")
-            return None
-            
-        except subprocess.CalledProcessError as e:
-            logger.error(f"Windows netsh command failed: {e}")
+            with NetworkDetector._detect_lock:
+                output = self._run(cmd)
+            match = re.search(pattern, output)
+            if match:
+                bssid = normalize_bssid(match.group(1))
+                logger.debug(f"Detected BSSID: {bssid}")
+                return bssid
             return None
         except Exception as e:
-            logger.error(f"Error getting Windows SSID: {e}")
+            logger.debug(f"Failed to get current BSSID: {e}")
             return None
     
-    def _get_ssid_macos(self) -> Optional[str]:
-        """Get SSID on macOS using airport utility."""
-        try:
-            # Try using networksetup first
-            cmd = ["networksetup", "-getairportnetwork", "en0"]
-            result = subprocess.run(cmd, capture_output=True, text=True, check=True)
-            
-            # Parse output (format: "Current Wi-Fi Network: NetworkName")
-            if "Current Wi-Fi Network:" in result.stdout:
-                ssid = result.stdout.split("Current Wi-Fi Network:")[-1].strip()
-                if ssid and ssid != "You are not associated with an AirPort network.":
-                    logger.debug(f"Detected macOS SSID: {ssid}")
-                    return ssid
-            
-            # Fallback to airport utility
-            airport_cmd = ["/System/Library/PrivateFrameworks/Apple80211.framework/Versions/Current/Resources/airport", "-I"]
-            airport_result = subprocess.run(airport_cmd, capture_output=True, text=True, check=True)
-            
-            for line in airport_result.stdout.split('\n'):
-                if 'SSID:' in line:
-                    ssid = line.split('SSID:')[-1].strip()
-                    logger.debug(f"Detected macOS SSID via airport: {ssid}")
-                    return ssid
-            
-            logger.debug("No active WiFi connection found on macOS")
-            return None
+    def watch(self, callback: Optional[Callable[["NetworkEvent"], None]] = None, queue=None,
+              poll_interval: float = 5.0, track_bssid: bool = False) -> "NetworkWatcher":
+        """
+        Start watching for network changes.
+        
+        Events are passed to ``callback`` (called from the watcher thread) and/or
+        put on an ``asyncio.Queue``. When a queue is given this must be called
+        from inside the event loop that owns it.
+        
+        Args:
+            callback: Function called with each NetworkEvent
+            queue: asyncio.Queue that receives each NetworkEvent
+            poll_interval: Seconds between SSID polls when events are unavailable
+            track_bssid: Also report roaming between access points (BSSID_CHANGED)
             
-        except subprocess.CalledProcessError as e:
-            logger.error(f"macOS network command failed: {e}")
-            return None
-        except Exception as e:
-            logger.error(f"Error getting macOS SSID: {e}")
-            return None
+        Returns:
+            The running NetworkWatcher; call stop() on it when done
+        """
+        loop = None
+        if queue is not None:
+            import asyncio
+            loop = asyncio.get_running_loop()
+        watcher = NetworkWatcher(self, callback=callback, queue=queue, loop=loop, poll_interval=poll_interval,
+                                 track_bssid=track_bssid)
+        watcher.start()
+        return watcher
+    
+    def _windows_netsh(self) -> Optional[str]:
+        """Get SSID on Windows using netsh command."""
+        output = self._run(["netsh", "wlan", "show", "interfaces"])
+        
+        # Parse the SSID from the interfaces output
+        for line in output.split('\n'):
+            if 'SSID' in line and 'BSSID' not in line:
+                # Extract SSID (format: "    SSID                   : NetworkName")
+                match = re.search(r'SSID\s*:\s*(.+)', line.strip())
+                if match:
+                    return match.group(1).strip()
+        return None
+    
+    def _macos_networksetup(self) -> Optional[str]:
+        """Get SSID on macOS using networksetup."""
+        output = self._run(["networksetup", "-getairportnetwork", "en0"])
+        
+        # Parse output (format: "Current Wi-Fi Network: NetworkName")
+        if "Current Wi-Fi Network:" in output:
+            ssid = output.split("Current Wi-Fi Network:")[-1].strip()
+            if ssid and ssid != "You are not associated with an AirPort network.":
+                return ssid
+        return None
+    
+    def _macos_airport(self) -> Optional[str]:
+        """Get SSID on macOS using the airport utility."""
+        output = self._run(["/System/Library/PrivateFrameworks/Apple80211.framework/Versions/Current/Resources/airport", "-I"])
+        
+        for line in output.split('\n'):
+            # " SSID:" so that the BSSID line does not match
+            if ' SSID:' in line:
+                return line.split('SSID:')[-1].strip() or None
+        return None
     
     def _get_ssid_linux(self) -> Optional[str]:
-        """Get SSID on Linux using various methods."""
-        methods = [
-            self._linux_iwgetid,
-            self._linux_nmcli,
-            self._linux_iwconfig
-        ]
+        """
+        Get SSID on Linux using various methods.
         
-        for method in methods:
+        The native kernel reader (nl80211/Wireless Extensions, no subprocess) is
+        tried first; when it works its answer is final, including "not
+        associated". Otherwise iwgetid, nmcli and iwconfig race each other,
+        skipping tools that are not installed.
+        """
+        if "_linux_native" not in NetworkDetector._missing_tools:
             try:
-                ssid = method()
+                ssid = self._linux_native()
                 if ssid:
                     logger.debug(f"Detected Linux SSID: {ssid}")
-                    return ssid
+                return ssid
+            except FileNotFoundError as e:
+                logger.debug(f"Native SSID detection unavailable: {e}")
+                NetworkDetector._missing_tools.add("_linux_native")
             except Exception as e:
-                logger.debug(f"Linux method {method.__name__} failed: {e}")
-                continue
+                logger.debug(f"Native SSID detection failed: {e}")
         
-        logger.debug("No active WiFi connection found on Linux")
-        return None
+        backends = [
+            method for method in (self._linux_iwgetid, self._linux_nmcli, self._linux_iwconfig)
+            if method.__name__ not in NetworkDetector._missing_tools
+        ]
+        ssid = self._race(backends)
+        if not ssid:
+            logger.debug("No active WiFi connection found on Linux")
+        return ssid
+    
+    @classmethod
+    def _get_native_reader(cls):
+        """Get the shared native kernel reader, importing it on first use."""
+        if cls._native_reader is None:
+            from linux_wireless import LinuxWirelessReader
+            cls._native_reader = LinuxWirelessReader()
+        return cls._native_reader
+    
+    def _linux_native(self) -> Optional[str]:
+        """Get SSID directly from the kernel via nl80211 or Wireless Extensions."""
+        return self._get_native_reader().get_ssid()
     
     def _linux_iwgetid(self) -> Optional[str]:
         """Get SSID using iwgetid command."""
-        cmd = ["iwgetid", "-r"]
-        result = subprocess.run(cmd, capture_output=True, text=True, check=True)
-        ssid = result.stdout.strip()
+        ssid = self._run(["iwgetid", "-r"]).strip()
         return ssid if ssid else None
     
     def _linux_nmcli(self) -> Optional[str]:
         """Get SSID using NetworkManager's nmcli."""
-        cmd = ["nmcli", "-t", "-f", "active,ssid", "dev", "wifi"]
-        result = subprocess.run(cmd, capture_output=True, text=True, check=True)
+        output = self._run(["nmcli", "-t", "-f", "active,ssid", "dev", "wifi"])
         
-        for line in result.stdout.split('\n'):
+        for line in output.split('\n'):
             if line.startswith('yes:'):
                 ssid = line.split(':', 1)[1]
                 return ssid if ssid else None
@@ -147,10 +301,9 @@ class NetworkDetector:
     
     def _linux_iwconfig(self) -> Optional[str]:
         """Get SSID using iwconfig command."""
-        cmd = ["iwconfig"]
-        result = subprocess.run(cmd, capture_output=True, text=True, check=True)
+        output = self._run(["iwconfig"])
         
-        for line in result.stdout.split('\n'):
+        for line in output.split('\n'):
             if 'ESSID:' in line:
                 match = re.search(r'ESSID:"([^"]*)"', line)
                 if match:
@@ -158,6 +311,253 @@ class NetworkDetector:
         return None
 
 
+class NetworkEvent:
+    """A network change reported by NetworkWatcher."""
+    
+    SSID_CHANGED = "ssid_changed"
+    BSSID_CHANGED = "bssid_changed"  # Roamed to another access point, same SSID
+    LINK_UP = "link_up"
+    LINK_DOWN = "link_down"
+    
+    def __init__(self, event_type: str, ssid: Optional[str] = None, previous_ssid: Optional[str] = None,
+                 interface: Optional[str] = None, bssid: Optional[str] = None,
+                 previous_bssid: Optional[str] = None):
+        self.type = event_type
+        self.ssid = ssid
+        self.previous_ssid = previous_ssid
+        self.interface = interface
+        self.bssid = bssid
+        self.previous_bssid = previous_bssid
+    
+    def __repr__(self) -> str:
+        return (f"NetworkEvent({self.type!r}, ssid={self.ssid!r}, "
+                f"previous_ssid={self.previous_ssid!r}, interface={self.interface!r}, "
+                f"bssid={self.bssid!r}, previous_bssid={self.previous_bssid!r})")
+
+
+class NetworkWatcher(threading.Thread):
+    """
+    Background thread that reports link and SSID changes.
+    
+    On Linux it subscribes to rtnetlink link notifications and re-reads the
+    SSID only when the kernel reports a change, so roaming is noticed within
+    milliseconds. Elsewhere, or if rtnetlink is unavailable, it polls
+    get_current_ssid() every ``poll_interval`` seconds.
+    
+    Link events are only reported for wireless interfaces, and only when
+    their state differs from the one read when the watcher started.
+    """
+    
+    # Wait this long after a netlink message for the rest of the burst
+    DEBOUNCE = 0.2
+    
+    def __init__(self, detector: NetworkDetector, callback=None, queue=None, loop=None, poll_interval: float = 5.0,
+                 track_bssid: bool = False):
+        super().__init__(name="network-watcher", daemon=True)
+        self.detector = detector
+        self.callback = callback
+        self.queue = queue
+        self.loop = loop
+        self.poll_interval = poll_interval
+        self._stop_event = threading.Event()
+        self.track_bssid = track_bssid
+        self._ssid = detector.get_current_ssid()
+        self._bssid = detector.get_current_bssid() if track_bssid else None
+        self._links: Dict[str, bool] = {}
+    
+    def stop(self) -> None:
+        """Stop watching; the thread exits within one poll interval."""
+        self._stop_event.set()
+    
+    def _emit(self, event: NetworkEvent) -> None:
+        logger.info(f"Network event: {event}")
+        if self.callback:
+            try:
+                self.callback(event)
+            except Exception as e:
+                logger.error(f"Network event callback failed: {e}")
+        if self.queue is not None and self.loop is not None:
+            self.loop.call_soon_threadsafe(self.queue.put_nowait, event)
+    
+    def _check_network(self) -> None:
+        ssid = self.detector.get_current_ssid(use_cache=False)
+        bssid = self.detector.get_current_bssid() if self.track_bssid else None
+        if ssid != self._ssid:
+            previous, self._ssid = self._ssid, ssid
+            previous_bssid, self._bssid = self._bssid, bssid
+            self._emit(NetworkEvent(NetworkEvent.SSID_CHANGED, ssid=ssid, previous_ssid=previous,
+                                    bssid=bssid, previous_bssid=previous_bssid))
+        elif bssid != self._bssid:
+            previous_bssid, self._bssid = self._bssid, bssid
+            self._emit(NetworkEvent(NetworkEvent.BSSID_CHANGED, ssid=ssid, previous_ssid=ssid,
+                                    bssid=bssid, previous_bssid=previous_bssid))
+    
+    def run(self) -> None:
+        sock = None
+        if self.detector.platform == "linux":
+            try:
+                from linux_wireless import open_link_monitor
+                sock = open_link_monitor()
+                logger.debug("Watching rtnetlink link events")
+            except Exception as e:
+                logger.debug(f"Link events unavailable, polling every {self.poll_interval}s: {e}")
+        
+        try:
+            if sock is not None:
+                self._run_netlink(sock)
+            else:
+                while not self._stop_event.wait(self.poll_interval):
+                    self._check_network()
+        finally:
+            if sock is not None:
+                sock.close()
+    
+    def _run_netlink(self, sock) -> None:
+        from linux_wireless import link_is_up, list_wireless_interfaces, parse_link_events
+        # Start from the current state so existing links are not reported as new
+        self._links = {ifname: link_is_up(ifname) for ifname in list_wireless_interfaces()}
+        while not self._stop_event.is_set():
+            # Wake up periodically to notice stop() and as a safety net poll
+            readable, _, _ = select.select([sock], [], [], self.poll_interval)
+            if not readable:
+                self._check_network()
+                continue
+            
+            events = []
+            while readable:
+                events.extend(parse_link_events(sock.recv(65536)))
+                readable, _, _ = select.select([sock], [], [], self.DEBOUNCE)
+            
+            # Loopback, bridges, containers and wired links are not our concern
+            wireless = set(list_wireless_interfaces())
+            for interface, is_up in events:
+                if interface not in wireless:
+                    continue
+                # An interface that appeared after startup was down before
+                if self._links.get(interface, False) != is_up:
+                    self._links[interface] = is_up
+                    event_type = NetworkEvent.LINK_UP if is_up else NetworkEvent.LINK_DOWN
+                    self._emit(NetworkEvent(event_type, ssid=self._ssid, interface=interface, bssid=self._bssid))
+            self._check_network()
+
+
+def normalize_bssid(bssid: str) -> str:
+    """Normalize a BSSID to lower-case, zero-padded, colon-separated form."""
+    parts = re.split(r"[:\-]", bssid.strip().lower())
+    return ":".join(part.zfill(2) for part in parts)
+
+
+def _glob_prefix(pattern: str) -> str:
+    """Get the literal prefix of a glob pattern (everything before the first wildcard)."""
+    match = re.search(r"[*?\[]", pattern)
+    return pattern[:match.start()] if match else pattern
+
+
+class ProfileIndex:
+    """
+    Precomputed lookup index over network profiles.
+
+    Profiles can be matched by any of these keys, checked in this order:
+        "bssid":        access point MAC address, or a list of them
+        "ssid":         exact SSID (case-sensitive)
+        "ssid_pattern": glob such as "Campus-Bldg-*", or a list of them
+        "ssid_regex":   regular expression matched against the whole SSID
+
+    BSSIDs and exact SSIDs are hash lookups. Glob patterns are bucketed by
+    their literal prefix, so a lookup only tries the buckets for prefixes of
+    the SSID (at most 33, since SSIDs are at most 32 bytes) regardless of how
+    many profiles exist. Regexes are tried last, in order. Among several
+    matching patterns the highest "priority" wins, then config order.
+    """
+
+    def __init__(self, networks: Dict[str, Dict]):
+        self.by_bssid: Dict[str, str] = {}
+        self.by_ssid: Dict[str, str] = {}
+        self.globs: Dict[str, List[Tuple[int, int, str, str]]] = {}
+        self.regexes: List[Tuple[int, int, str, "re.Pattern"]] = []
+
+        for order, (name, profile) in enumerate(networks.items()):
+            if not isinstance(profile, dict):
+                continue
+            priority = int(profile.get("priority", 0))
+            for bssid in self._as_list(profile.get("bssid")):
+                self.by_bssid.setdefault(normalize_bssid(bssid), name)
+            if profile.get("ssid"):
+                # First profile wins, as with the old linear scan
+                self.by_ssid.setdefault(profile["ssid"], name)
+            for pattern in self._as_list(profile.get("ssid_pattern")):
+                self.globs.setdefault(_glob_prefix(pattern), []).append(
+                    (-priority, order, name, fnmatch.translate(pattern)))
+            for regex in self._as_list(profile.get("ssid_regex")):
+                self.regexes.append((-priority, order, name, re.compile(regex)))
+
+        # Compile glob patterns once, keeping each bucket sorted by precedence
+        for prefix, entries in self.globs.items():
+            entries.sort()
+            self.globs[prefix] = [(p, o, n, re.compile(rx)) for p, o, n, rx in entries]
+        self.regexes.sort(key=lambda entry: entry[:2])
+
+    @staticmethod
+    def _as_list(value) -> List[str]:
+        """Accept a single string or a list of strings."""
+        if not value:
+            return []
+        return [value] if isinstance(value, str) else list(value)
+
+    @property
+    def has_bssid_rules(self) -> bool:
+        """Whether any profile matches on BSSID (so detection of it is worthwhile)."""
+        return bool(self.by_bssid)
+
+    def match(self, ssid: Optional[str], bssid: Optional[str] = None) -> Optional[str]:
+        """
+        Find the profile name for the current network.
+
+        Returns:
+            Matching profile name, or None if no profile matches
+        """
+        if bssid:
+            name = self.by_bssid.get(normalize_bssid(bssid))
+            if name:
+                return name
+        if not ssid:
+            return None
+
+        name = self.by_ssid.get(ssid)
+        if name:
+            return name
+
+        best = None
+        for end in range(len(ssid) + 1):
+            for entry in self.globs.get(ssid[:end], ()):
+                if entry[3].match(ssid):
+                    if best is None or entry[:2] < best[:2]:
+                        best = entry
+                    # Bucket is sorted, later entries cannot beat this one
+                    break
+        if best:
+            return best[2]
+
+        for _, _, name, regex in self.regexes:
+            if regex.fullmatch(ssid):
+                return name
+        return None
+
+
+# Index of the most recently indexed networks dict. The config cache hands out
+# the same dict until config.json changes, so identity tells us when to rebuild.
+_index_cache: Dict[str, object] = {"networks": None, "index": None}
+
+
+def get_profile_index(networks: Dict[str, Dict]) -> ProfileIndex:
+    """Get the ProfileIndex for a networks dict, building it only when the dict changes."""
+    if _index_cache["networks"] is not networks:
+        _index_cache["index"] = ProfileIndex(networks)
+        _index_cache["networks"] = networks
+        logger.debug(f"Built profile index for {len(networks)} networks")
+    return _index_cache["index"]
+
+
 class NetworkProfileManager:
     """Manages network profiles and configuration loading."""
     
@@ -167,17 +567,18 @@ class NetworkProfileManager:
         logger.debug(f"Initialized NetworkProfileManager with config: {config_path}")
     
     def load_config(self) -> Dict:
-        """Load and parse configuration file."""
-        if not os.path.exists(self.config_path):
+        """
+        Load the parsed configuration with passwords decrypted.
+
+        Served from the process-wide config cache, so the file is only re-read
+        and re-decrypted when it changes on disk. The result must not be modified.
+        """
+        try:
+            return get_config(self.config_path)
+        except FileNotFoundError:
             raise FileNotFoundError(
                 f"Missing {self.config_path}. Please copy config.example.json to {self.config_path} and configure your networks."
             )
-        
-        with open(self.config_path, "r") as f:
-            config = json.load(f)
-        
-        logger.debug(f"Loaded configuration from {self.config_path}")
-        return config
     
     def get_available_networks(self) -> List[str]:
         """Get list of configured network profile names."""
@@ -213,14 +614,19 @@ class NetworkProfileManager:
         # Handle legacy configuration format
         if "networks" not in config:
             logger.info("Using legacy configuration format")
+            # Keep optional per-profile sections (http, retry, ...) from the top level
             legacy_config = {
+                key: value for key, value in config.items()
+                if key not in ("dashboard", "daemon", "connectivity", "default_network")
+            }
+            legacy_config.update({
                 "ssid": config.get("ssid", "Unknown"),
                 "wifi_url": config["wifi_url"],
                 "username": config["username"],
                 "password": config["password"],
                 "product_type": config.get("product_type", "0"),
                 "description": "Legacy configuration"
-            }
+            })
             return "legacy", legacy_config
         
         networks = config["networks"]
@@ -235,15 +641,17 @@ class NetworkProfileManager:
         
         # Auto-detect current network
         if auto_detect:
+            index = get_profile_index(networks)
             current_ssid = self.detector.get_current_ssid()
-            if current_ssid:
+            current_bssid = self.detector.get_current_bssid() if index.has_bssid_rules else None
+            if current_ssid or current_bssid:
                 logger.info(f"Detected current SSID: {current_ssid}")
                 
-                # Find matching network profile by SSID
-                for profile_name, profile_config in networks.items():
-                    if profile_config.get("ssid") == current_ssid:
-                        logger.info(f"Found matching network profile: {profile_name}")
-                        return profile_name, profile_config
+                # Find matching network profile by BSSID, SSID or pattern
+                profile_name = index.match(current_ssid, current_bssid)
+                if profile_name:
+                    logger.info(f"Found matching network profile: {profile_name}")
+                    return profile_name, networks[profile_name]
                 
                 logger.warning(f"No network profile found for SSID: {current_ssid}")
             else:
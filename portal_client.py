@@ -0,0 +1,354 @@
+"""
+Portal HTTP client for WiFi Auto Auth.
+Provides pooled keep-alive sessions, per-profile timeouts, retries with
+exponential backoff, a per-portal circuit breaker and session keep-alive
+heartbeats for captive portal requests.
+"""
+
+import random
+import re
+import threading
+import time
+from typing import Dict, Optional, Tuple
+from urllib.parse import urlsplit, urlunsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from config.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+# Defaults used when a network profile has no "http" section
+DEFAULT_CONNECT_TIMEOUT = 3.05
+DEFAULT_READ_TIMEOUT = 10
+DEFAULT_POOL_SIZE = 4
+
+# Defaults used when a network profile has no "retry" / "circuit_breaker" section
+DEFAULT_MAX_ATTEMPTS = 3
+DEFAULT_BASE_DELAY = 1.0
+DEFAULT_MAX_DELAY = 30.0
+DEFAULT_DEADLINE = 60.0
+DEFAULT_FAILURE_THRESHOLD = 5
+DEFAULT_RESET_TIMEOUT = 60.0
+
+# Consecutive 404s after which a keep-alive URL is taken as unsupported
+KEEPALIVE_MAX_NOT_FOUND = 3
+
+
+class CircuitOpenError(requests.exceptions.RequestException):
+    """Raised when a portal's circuit breaker is open and the request was not sent."""
+
+
+def get_http_settings(profile: Optional[Dict] = None) -> Dict:
+    """
+    Get HTTP settings for a network profile.
+
+    Profiles may contain an optional "http" section:
+        {"connect_timeout": 3, "read_timeout": 10, "pool_size": 4}
+
+    Returns:
+        Dict with connect_timeout, read_timeout and pool_size filled in
+    """
+    http = (profile or {}).get("http", {})
+    return {
+        "connect_timeout": float(http.get("connect_timeout", DEFAULT_CONNECT_TIMEOUT)),
+        "read_timeout": float(http.get("read_timeout", DEFAULT_READ_TIMEOUT)),
+        "pool_size": max(1, int(http.get("pool_size", DEFAULT_POOL_SIZE))),
+    }
+
+
+def get_timeout(profile: Optional[Dict] = None) -> Tuple[float, float]:
+    """Get the (connect, read) timeout tuple for a network profile."""
+    settings = get_http_settings(profile)
+    return settings["connect_timeout"], settings["read_timeout"]
+
+
+class PortalSessionPool:
+    """
+    Keeps keep-alive ``requests.Session`` objects alive for the whole process.
+
+    Sessions are shared by pool size, so every profile with the same pool size
+    reuses the same connection pools (urllib3 keeps one pool per host). This
+    means retries and different profiles pointing at the same portal skip the
+    TCP/TLS handshake once a connection is open.
+    """
+
+    def __init__(self):
+        self._sessions: Dict[int, requests.Session] = {}
+        self._lock = threading.Lock()
+
+    def get_session(self, profile: Optional[Dict] = None) -> requests.Session:
+        """Get the shared session for a network profile, creating it if needed."""
+        pool_size = get_http_settings(profile)["pool_size"]
+        with self._lock:
+            session = self._sessions.get(pool_size)
+            if session is None:
+                session = self._create_session(pool_size)
+                self._sessions[pool_size] = session
+            return session
+
+    @staticmethod
+    def _create_session(pool_size: int) -> requests.Session:
+        """Create a session whose per-host connection pool holds at most pool_size connections."""
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=0)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        logger.debug(f"Created HTTP session with pool size {pool_size}")
+        return session
+
+    def close(self) -> None:
+        """Close all sessions and their pooled connections."""
+        with self._lock:
+            for session in self._sessions.values():
+                session.close()
+            self._sessions.clear()
+
+
+# Process-wide pool used by the convenience functions below
+_pool = PortalSessionPool()
+
+
+def get_session(profile: Optional[Dict] = None) -> requests.Session:
+    """Get the shared keep-alive session for a network profile."""
+    return _pool.get_session(profile)
+
+
+def close_sessions() -> None:
+    """Close all shared sessions (call on shutdown)."""
+    _pool.close()
+
+
+class RetryPolicy:
+    """
+    Retry policy with exponential backoff and full jitter.
+
+    The delay before retry n (0-based) is a random value between 0 and
+    min(max_delay, base_delay * 2**n), so many clients retrying against the
+    same portal spread out instead of hitting it in lockstep. No retry is
+    started if it would end after ``deadline`` seconds from the first attempt.
+    """
+
+    def __init__(self, max_attempts: int = DEFAULT_MAX_ATTEMPTS, base_delay: float = DEFAULT_BASE_DELAY,
+                 max_delay: float = DEFAULT_MAX_DELAY, deadline: float = DEFAULT_DEADLINE):
+        self.max_attempts = max(1, int(max_attempts))
+        self.base_delay = max(0.0, float(base_delay))
+        self.max_delay = max(0.0, float(max_delay))
+        self.deadline = max(0.0, float(deadline))
+
+    @classmethod
+    def from_profile(cls, profile: Optional[Dict] = None) -> "RetryPolicy":
+        """Build a policy from a profile's optional "retry" section."""
+        retry = (profile or {}).get("retry", {})
+        return cls(
+            max_attempts=retry.get("max_attempts", DEFAULT_MAX_ATTEMPTS),
+            base_delay=retry.get("base_delay", DEFAULT_BASE_DELAY),
+            max_delay=retry.get("max_delay", DEFAULT_MAX_DELAY),
+            deadline=retry.get("deadline", DEFAULT_DEADLINE),
+        )
+
+    def get_delay(self, attempt: int) -> float:
+        """Get the jittered delay to wait after the given (0-based) attempt."""
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker for a single portal URL.
+
+    After ``failure_threshold`` consecutive failures the circuit opens and
+    requests are refused without touching the network. Once ``reset_timeout``
+    seconds have passed it half-opens and lets a single trial request through;
+    success closes the circuit, failure opens it again.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = DEFAULT_FAILURE_THRESHOLD,
+                 reset_timeout: float = DEFAULT_RESET_TIMEOUT):
+        self.failure_threshold = max(1, int(failure_threshold))
+        self.reset_timeout = max(0.0, float(reset_timeout))
+        self.state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._lock = threading.Lock()
+
+    def allow_request(self) -> bool:
+        """Check whether a request may be sent now."""
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                # Let exactly one trial request through
+                self.state = self.HALF_OPEN
+                return True
+            return False
+
+    def record_success(self) -> None:
+        """Record a successful request and close the circuit."""
+        with self._lock:
+            if self.state != self.CLOSED:
+                logger.info("Portal recovered, closing circuit breaker")
+            self.state = self.CLOSED
+            self._failures = 0
+
+    def record_failure(self) -> None:
+        """Record a failed request, opening the circuit if the threshold is reached."""
+        with self._lock:
+            self._failures += 1
+            if self.state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    logger.warning(f"Opening circuit breaker after {self._failures} consecutive failures")
+                self.state = self.OPEN
+                self._opened_at = time.monotonic()
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+
+def get_circuit_breaker(url: str, profile: Optional[Dict] = None) -> CircuitBreaker:
+    """Get the circuit breaker for a portal URL, creating it from the profile's settings if needed."""
+    with _breakers_lock:
+        breaker = _breakers.get(url)
+        if breaker is None:
+            settings = (profile or {}).get("circuit_breaker", {})
+            breaker = CircuitBreaker(
+                failure_threshold=settings.get("failure_threshold", DEFAULT_FAILURE_THRESHOLD),
+                reset_timeout=settings.get("reset_timeout", DEFAULT_RESET_TIMEOUT),
+            )
+            _breakers[url] = breaker
+        return breaker
+
+
+def post_with_retry(url: str, data: Dict, profile: Optional[Dict] = None,
+                    session: Optional[requests.Session] = None) -> requests.Response:
+    """
+    POST to a captive portal with retries, backoff and circuit breaking.
+
+    Connection errors, timeouts and 5xx responses are retried according to the
+    profile's RetryPolicy. Any other response is returned immediately.
+
+    Returns:
+        The last response received from the portal
+
+    Raises:
+        CircuitOpenError: If the portal's circuit breaker refuses the request
+        requests.exceptions.RequestException: If no attempt got a response
+    """
+    session = session or get_session(profile)
+    policy = RetryPolicy.from_profile(profile)
+    breaker = get_circuit_breaker(url, profile)
+    connect_timeout, read_timeout = get_timeout(profile)
+    deadline = time.monotonic() + policy.deadline
+
+    last_response = None
+    last_error = None
+    for attempt in range(policy.max_attempts):
+        if not breaker.allow_request():
+            if last_response is not None:
+                return last_response
+            raise CircuitOpenError(f"Circuit breaker open for {url}, skipping login request")
+
+        try:
+            response = session.post(url, data=data, timeout=(connect_timeout, read_timeout))
+        except requests.exceptions.RequestException as e:
+            breaker.record_failure()
+            last_error = e
+            logger.warning(f"Login attempt {attempt + 1}/{policy.max_attempts} failed: {e}")
+        else:
+            if response.status_code < 500:
+                breaker.record_success()
+                return response
+            breaker.record_failure()
+            last_response = response
+            logger.warning(f"Login attempt {attempt + 1}/{policy.max_attempts} got status {response.status_code}")
+
+        if attempt + 1 >= policy.max_attempts:
+            break
+        delay = policy.get_delay(attempt)
+        if time.monotonic() + delay >= deadline:
+            logger.warning("Retry deadline reached, giving up")
+            break
+        logger.debug(f"Retrying in {delay:.2f}s")
+        time.sleep(delay)
+
+    if last_response is not None:
+        return last_response
+    raise last_error
+
+
+def get_keepalive_url(profile: Dict) -> str:
+    """
+    Get the keep-alive URL for a profile.
+
+    Uses the profile's "keepalive_url" if set; otherwise the last path segment
+    of "wifi_url" is replaced with "live" (e.g. /login.xml -> /live), which is
+    where mode=191 portals answer keep-alive requests.
+    """
+    if profile.get("keepalive_url"):
+        return profile["keepalive_url"]
+    parts = urlsplit(profile["wifi_url"])
+    path = parts.path.rsplit("/", 1)[0] + "/live"
+    return urlunsplit((parts.scheme, parts.netloc, path, "", ""))
+
+
+# Consecutive 404 answers per keep-alive URL; URLs that reached
+# KEEPALIVE_MAX_NOT_FOUND are not sent heartbeats again in this process
+_keepalive_not_found: Dict[str, int] = {}
+_keepalive_lock = threading.Lock()
+
+
+def send_keepalive(profile: Dict, session: Optional[requests.Session] = None) -> Optional[bool]:
+    """
+    Send a keep-alive request (mode=192) for the profile's logged-in user.
+
+    Only an explicit negative <ack> means the session is gone. Error statuses
+    and answers without an <ack> are inconclusive, so a portal without a
+    keep-alive endpoint never triggers logins; after KEEPALIVE_MAX_NOT_FOUND
+    consecutive 404s its URL gets no more heartbeats.
+
+    Returns:
+        True if the portal acknowledged the session, False if the portal says
+        the session has expired and a full login is needed, None if the
+        answer was inconclusive, the portal unreachable or keep-alive
+        unsupported
+    """
+    url = get_keepalive_url(profile)
+    with _keepalive_lock:
+        if _keepalive_not_found.get(url, 0) >= KEEPALIVE_MAX_NOT_FOUND:
+            return None
+    session = session or get_session(profile)
+    params = {
+        "mode": "192",
+        "username": profile["username"],
+        "a": str(int(time.time() * 1000)),
+        "producttype": profile.get("product_type", "0"),
+    }
+    try:
+        response = session.get(url, params=params, timeout=get_timeout(profile))
+    except requests.exceptions.RequestException as e:
+        logger.debug(f"Keep-alive request failed: {e}")
+        return None
+
+    with _keepalive_lock:
+        if response.status_code == 404:
+            misses = _keepalive_not_found[url] = _keepalive_not_found.get(url, 0) + 1
+            if misses >= KEEPALIVE_MAX_NOT_FOUND:
+                logger.info(f"Keep-alive URL {url} not found {misses} times, no longer sending keep-alives; "
+                            f"set \"keepalive_url\" in the network profile if the portal has one")
+        else:
+            _keepalive_not_found.pop(url, None)
+
+    match = re.search(r"<ack><!\[CDATA\[(.*?)\]\]></ack>", response.text)
+    if response.status_code != 200 or not match:
+        logger.debug(f"Inconclusive keep-alive answer (status {response.status_code}), keeping the session")
+        return None
+    if match.group(1) == "ack":
+        logger.debug("Keep-alive acknowledged by portal")
+        return True
+    logger.info(f"Keep-alive rejected by portal ({match.group(1)!r}), session expired")
+    return False
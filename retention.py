@@ -0,0 +1,130 @@
+"""
+Retention policy for WiFi Auto Auth login history.
+Rolls raw login attempts older than N days up into hourly per-network totals,
+prunes the raw rows in bounded chunks and returns freed pages to the OS.
+"""
+
+import time
+from typing import Dict, Optional
+
+from config.logging_config import get_logger
+from log_store import HOUR, HOUR_SQL
+
+logger = get_logger(__name__)
+
+# Defaults used when config.json has no "retention" section
+DEFAULT_RETENTION_DAYS = 0  # 0 keeps raw attempts forever
+DEFAULT_CHUNK_SIZE = 1000  # raw rows rolled up and deleted per transaction
+DEFAULT_VACUUM_PAGES = 1000  # free pages released per run
+DEFAULT_RETENTION_INTERVAL = 24 * 3600  # seconds between runs in daemon mode
+
+# Both statements select the same chunk: the oldest rows before the cutoff,
+# in a fixed order, read inside one transaction
+_CHUNK = f"SELECT id FROM login_attempts WHERE {HOUR_SQL} < ? ORDER BY {HOUR_SQL}, id LIMIT ?"
+
+_ROLLUP_CHUNK_SQL = f"""
+    INSERT INTO attempt_rollups (hour, network_name, network_ssid, total, success, last_attempt)
+    SELECT {HOUR_SQL}, IFNULL(network_name, ''), IFNULL(network_ssid, ''),
+           COUNT(*), SUM(response_status = '200'), MAX(timestamp)
+    FROM login_attempts
+    WHERE id IN ({_CHUNK})
+    GROUP BY 1, 2, 3
+    ON CONFLICT (hour, network_name, network_ssid) DO UPDATE SET
+        total = total + excluded.total,
+        success = success + excluded.success,
+        last_attempt = MAX(last_attempt, excluded.last_attempt)
+"""
+
+_DELETE_CHUNK_SQL = f"DELETE FROM login_attempts WHERE id IN ({_CHUNK})"
+
+
+class RetentionPolicy:
+    """
+    Keeps raw login attempts for ``days`` days and hourly rollups forever.
+
+    Each chunk of at most ``chunk_size`` expired rows is rolled up and deleted
+    in its own short transaction, so writers and the dashboard are never
+    locked out for long. The cutoff is aligned to an hour boundary so every
+    hour is rolled up in one piece; late rows for an already rolled-up hour
+    are merged into its totals.
+    """
+
+    def __init__(self, days: int = DEFAULT_RETENTION_DAYS, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                 vacuum_pages: int = DEFAULT_VACUUM_PAGES):
+        self.days = max(0, int(days))
+        self.chunk_size = max(1, int(chunk_size))
+        self.vacuum_pages = max(0, int(vacuum_pages))
+
+    @classmethod
+    def from_settings(cls, settings: Optional[Dict] = None) -> "RetentionPolicy":
+        """
+        Build a policy from the optional "retention" section of config.json:
+            {"days": 90, "chunk_size": 1000, "vacuum_pages": 1000}
+        """
+        settings = settings or {}
+        return cls(
+            days=settings.get("days", DEFAULT_RETENTION_DAYS),
+            chunk_size=settings.get("chunk_size", DEFAULT_CHUNK_SIZE),
+            vacuum_pages=settings.get("vacuum_pages", DEFAULT_VACUUM_PAGES),
+        )
+
+    @property
+    def enabled(self) -> bool:
+        return self.days > 0
+
+    def cutoff_hour(self, now: Optional[float] = None) -> int:
+        """Get the first epoch hour whose raw attempts are kept."""
+        return int((now or time.time()) - self.days * 86400) // HOUR
+
+    def run(self, store, now: Optional[float] = None, convert_vacuum: bool = False) -> int:
+        """
+        Roll up and prune expired attempts, then vacuum incrementally.
+
+        Args:
+            store: LogStore to prune
+            now: Epoch time the retention period is measured from (default: now)
+            convert_vacuum: Allow the one-off full VACUUM that switches an
+                existing database to incremental auto-vacuum. It holds the
+                write lock for as long as it takes, so only explicit
+                ``--apply-retention`` runs pass True, never the daemon.
+
+        Returns:
+            Number of raw attempts rolled up
+        """
+        if not self.enabled:
+            return 0
+
+        cutoff = self.cutoff_hour(now)
+        params = (cutoff, self.chunk_size)
+        pruned = 0
+        while True:
+            with store.transaction() as conn:
+                conn.execute(_ROLLUP_CHUNK_SQL, params)
+                deleted = conn.execute(_DELETE_CHUNK_SQL, params).rowcount
+            pruned += deleted
+            if deleted < self.chunk_size:
+                break
+
+        if pruned:
+            logger.info(f"Rolled up {pruned} login attempts older than {self.days} days")
+        self._vacuum(store, convert_vacuum)
+        return pruned
+
+    def _vacuum(self, store, convert: bool = False) -> None:
+        """Release free pages, converting the database to incremental auto-vacuum if allowed."""
+        if not self.vacuum_pages:
+            return
+        if store.query_one("PRAGMA auto_vacuum")[0] != 2:
+            # auto_vacuum can only change on an existing database with a full VACUUM
+            if not convert:
+                logger.info("Database does not use incremental vacuum; run --apply-retention "
+                            "once to convert it (one-off full VACUUM)")
+                return
+            logger.info("Enabling incremental vacuum (one-off full VACUUM)")
+            store.execute("PRAGMA auto_vacuum=INCREMENTAL")
+            store.execute("VACUUM")
+            return
+        free = store.query_one("PRAGMA freelist_count")[0]
+        if free:
+            store.query(f"PRAGMA incremental_vacuum({self.vacuum_pages})")
+            logger.debug(f"Released up to {min(free, self.vacuum_pages)} of {free} free pages")
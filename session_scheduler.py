@@ -0,0 +1,135 @@
+"""
+Predictive re-login scheduling for WiFi Auto Auth.
+Learns how long each portal keeps a session alive and schedules a fresh login
+shortly before the session is expected to expire.
+"""
+
+import time
+from typing import Dict, List, Optional
+
+from config.logging_config import get_logger
+from log_store import now_epoch
+
+logger = get_logger(__name__)
+
+# Defaults used when config.json has no matching "daemon" settings
+DEFAULT_RELOGIN_MARGIN = 60  # seconds before predicted expiry to log in again
+MIN_SAMPLES = 3  # observations needed before a prediction is made
+MIN_LIFETIME = 120  # gaps shorter than this are retries, not session expiries
+MAX_LIFETIME = 24 * 3600  # gaps longer than this are the machine being off
+HISTORY_LIMIT = 50  # most recent logins/observations considered
+
+# login_attempts.reason of the daemon's proactive re-logins
+PROACTIVE_RELOGIN = "proactive"
+
+
+def _lower_quartile(values: List[float]) -> float:
+    """Get the 25th percentile, erring on the side of logging in early."""
+    values = sorted(values)
+    return values[(len(values) - 1) // 4]
+
+
+class ReloginScheduler:
+    """
+    Predicts session expiry per network profile and schedules re-logins.
+
+    Session lifetimes are learned from two sources in the database:
+    - ``session_lifetimes``: expiries observed by the daemon (a rejected
+      keep-alive or a captive portal reappearing after a login)
+    - ``login_attempts``: gaps between consecutive successful logins, used to
+      bootstrap a profile that has too few observations; the bootstrap is
+      kept in memory only and never written to ``session_lifetimes``
+
+    Proactive re-logins are tagged with PROACTIVE_RELOGIN and are neither
+    recorded as observations nor counted as the end of a login gap, so the
+    estimate does not shrink by the safety margin on every cycle or restart.
+    """
+
+    def __init__(self, store, margin: float = DEFAULT_RELOGIN_MARGIN):
+        self.store = store
+        self.margin = margin
+        self._estimates: Dict[str, float] = {}
+
+    def estimate_lifetime(self, network_name: str) -> Optional[float]:
+        """
+        Estimate the session lifetime of a network profile in seconds.
+
+        Returns:
+            Estimated lifetime, or None if there is not enough history
+        """
+        if network_name in self._estimates:
+            return self._estimates[network_name]
+
+        rows = self.store.query(
+            "SELECT lifetime FROM session_lifetimes WHERE network_name = ? ORDER BY id DESC LIMIT ?",
+            (network_name, HISTORY_LIMIT),
+        )
+        observed = [row[0] for row in rows]
+        if len(observed) >= MIN_SAMPLES:
+            estimate = _lower_quartile(observed)
+        else:
+            estimate = self._estimate_from_logins(network_name)
+
+        # Not enough history is not cached, so new logins are picked up
+        if estimate is not None:
+            logger.info(f"Estimated session lifetime for '{network_name}': {estimate:.0f}s")
+            self._estimates[network_name] = estimate
+        return estimate
+
+    def _estimate_from_logins(self, network_name: str) -> Optional[float]:
+        """
+        Estimate the lifetime from gaps between successful logins.
+
+        A gap ending in a proactive re-login only shows how early we renewed
+        the session, not when it would have expired, so it is skipped.
+        """
+        rows = self.store.query("""
+            SELECT timestamp, reason FROM login_attempts
+            WHERE network_name = ? AND response_status = '200'
+            ORDER BY id DESC LIMIT ?
+        """, (network_name, HISTORY_LIMIT))
+        # login_attempts timestamps are epoch seconds
+        gaps = [
+            newer[0] - older[0]
+            for newer, older in zip(rows, rows[1:])
+            if newer[1] != PROACTIVE_RELOGIN and MIN_LIFETIME <= newer[0] - older[0] <= MAX_LIFETIME
+        ]
+        if len(gaps) < MIN_SAMPLES:
+            return None
+        return _lower_quartile(gaps)
+
+    def _store_observation(self, network_name: str, lifetime: float) -> None:
+        """Store an observed session lifetime."""
+        self.store.execute(
+            "INSERT INTO session_lifetimes (network_name, observed_at, lifetime) VALUES (?, ?, ?)",
+            (network_name, now_epoch(), lifetime),
+        )
+
+    def record_expiry(self, network_name: str, login_time: float, expired_time: Optional[float] = None) -> None:
+        """
+        Record that a session expired before we re-logged in.
+
+        Args:
+            network_name: Profile whose session expired
+            login_time: Epoch time of the login that started the session
+            expired_time: Epoch time the expiry was detected (default: now)
+        """
+        lifetime = (expired_time or time.time()) - login_time
+        if not MIN_LIFETIME <= lifetime <= MAX_LIFETIME:
+            return
+        logger.info(f"Observed session lifetime for '{network_name}': {lifetime:.0f}s")
+        self._store_observation(network_name, lifetime)
+        # Re-estimate on next use
+        self._estimates.pop(network_name, None)
+
+    def next_relogin(self, network_name: str, login_time: float) -> Optional[float]:
+        """
+        Get the epoch time at which the profile should log in again.
+
+        Returns:
+            Epoch time of the proactive re-login, or None if no prediction is possible
+        """
+        lifetime = self.estimate_lifetime(network_name)
+        if lifetime is None:
+            return None
+        return login_time + max(lifetime - self.margin, MIN_LIFETIME / 2)
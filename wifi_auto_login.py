@@ -1,78 +1,36 @@
-
-import sqlite3
-import requests
 import datetime
 import re
-import socket 
 import argparse
 import json
-import os
-from cryptography.fernet import Fernet
+import signal
+import threading
+import time
+from config.config_cache import get_config
+from log_store import get_store, close_stores, now_epoch, format_timestamp
+
+# requests (via portal_client), cryptography (via config_cache) and the
+# connectivity probes are imported by the functions that need them, so
+# read-only commands such as --view-logs start without loading them.
 
 
 # --- CONFIGURATION ---
 CONFIG_PATH = "config.json"
 
-SECRET_KEY_PATH = "config/secret.key"
-
-def get_or_create_secret_key():
-    if os.path.exists(SECRET_KEY_PATH):
-        with open(SECRET_KEY_PATH, "rb") as f:
-            return f.read()
-    key = Fernet.generate_key()
-    os.makedirs(os.path.dirname(SECRET_KEY_PATH), exist_ok=True)
-    with open(SECRET_KEY_PATH, "wb") as f:
-        f.write(key)
-    return key
-
-def encrypt_if_plaintext(value, fernet):
-    # If already encrypted, leave as is
-    try:
-        fernet.decrypt(value.encode())
-        return value
-    except Exception:
-        # Not encrypted, encrypt
-        return fernet.encrypt(value.encode()).decode()
+def load_config():
+    """
+    Load the configuration file and return the config dict.
 
-def decrypt_if_encrypted(value, fernet):
+    Plaintext passwords are encrypted on disk the first time the file is read;
+    the returned dict holds them decrypted in memory. The parsed result is
+    cached process-wide until config.json changes, so repeated calls are cheap.
+    The returned dict is shared and must not be modified.
+    """
     try:
-        return fernet.decrypt(value.encode()).decode()
-    except Exception:
-        return value
-
-
-def load_config():
-    """Load configuration file, encrypt plaintext passwords, and return config dict"""
-    if not os.path.exists(CONFIG_PATH):
+        return get_config(CONFIG_PATH)
+    except FileNotFoundError:
         raise FileNotFoundError(
             "Missing config.json. Please copy config.example.json to config.json and fill in your details."
         )
-    with open(CONFIG_PATH, "r") as f:
-        config = json.load(f)
-
-    key = get_or_create_secret_key()
-    fernet = Fernet(key)
-
-    updated = False
-    # Encrypt WiFi password if plaintext
-    if "password" in config:
-        orig = config["password"]
-        enc = encrypt_if_plaintext(orig, fernet)
-        if enc != orig:
-            config["password"] = enc
-            updated = True
-    # Encrypt dashboard password if plaintext
-    if "dashboard" in config and "password" in config["dashboard"]:
-        orig = config["dashboard"]["password"]
-        enc = encrypt_if_plaintext(orig, fernet)
-        if enc != orig:
-            config["dashboard"]["password"] = enc
-            updated = True
-    if updated:
-        with open(CONFIG_PATH, "w") as f:
-            json.dump(config, f, indent=2)
-
-    return config
 
 # Initialize logging first
 from config.logging_config import setup_logging_from_env, get_logger
@@ -81,7 +39,7 @@ logger = get_logger(__name__)
 
 # Import network utilities for multi-network support
 try:
-    from network_utils import NetworkProfileManager, get_current_ssid
+    from network_utils import NetworkProfileManager, NetworkDetector, NetworkEvent, get_current_ssid
     MULTI_NETWORK_SUPPORT = True
     logger.info("Multi-network support enabled")
 except ImportError as e:
@@ -94,76 +52,62 @@ URL = None
 USERNAME = None
 PASSWORD = None
 PRODUCT_TYPE = None
-FERNET_KEY = get_or_create_secret_key()
-FERNET = Fernet(FERNET_KEY)
+ACTIVE_PROFILE = None  # Profile config of the last successful login, used for keep-alives
+ACTIVE_NETWORK = None  # Profile name of the last successful login
 
 # --- DATABASE SETUP ---
 DB_NAME = "wifi_log.db"
 
-def check_connectivity(host="8.8.8.8", port=53, timeout=3):
+PROBE_ENGINE = None  # Connectivity probe engine, configured on first use
+
+def get_probe_engine():
     """
-    Check for an active internet connection by connecting to a known host.
+    Get the connectivity probe engine for every entry point (one-shot, cron
+    and daemon), configured once from the "connectivity" section of
+    config.json. Without a config file the built-in probes are used.
     """
-    try:
-        socket.setdefaulttimeout(timeout)
-        with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
-            s.connect((host, port))
-        return True
-    except (socket.error, OSError):
-        return False
-# Initialize logging
-from config.logging_config import setup_logging_from_env, get_logger
-setup_logging_from_env()
-logger = get_logger(__name__)
+    global PROBE_ENGINE
+    if PROBE_ENGINE is None:
+        import connectivity
+        try:
+            settings = load_config().get("connectivity")
+        except FileNotFoundError:
+            settings = None
+        PROBE_ENGINE = connectivity.configure(settings)
+    return PROBE_ENGINE
+
+def check_connectivity(use_cache=True):
+    """
+    Check for an active internet connection.
+
+    Several probes (TCP over IPv4/IPv6, an HTTP 204 endpoint and a DNS lookup)
+    run concurrently and the first success wins; the verdict is cached briefly.
+    """
+    return get_probe_engine().is_online(use_cache)
+
+def get_connectivity_state(use_cache=True):
+    """Get the connectivity state: connectivity.ONLINE, PORTAL or OFFLINE."""
+    return get_probe_engine().check(use_cache)
 
 def setup_database():
-    """Create the database and table if they do not exist."""
-    conn = sqlite3.connect(DB_NAME)
-    cursor = conn.cursor()
-    
-    # Check if the table exists and get its schema
-    cursor.execute("PRAGMA table_info(login_attempts)")
-    columns = [row[1] for row in cursor.fetchall()]
-    
-    if not columns:
-        # Create new table with network support
-        cursor.execute("""
-            CREATE TABLE login_attempts (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                timestamp TEXT,
-                network_name TEXT,
-                network_ssid TEXT,
-                username TEXT,
-                password TEXT,
-                a TEXT,
-                response_status TEXT,
-                response_message TEXT
-            )
-        """)
-        logger.info("Created new login_attempts table with network support")
-    else:
-        # Check if we need to add network columns to existing table
-        if 'network_name' not in columns:
-            cursor.execute("ALTER TABLE login_attempts ADD COLUMN network_name TEXT")
-            logger.info("Added network_name column to existing table")
-        
-        if 'network_ssid' not in columns:
-            cursor.execute("ALTER TABLE login_attempts ADD COLUMN network_ssid TEXT")
-            logger.info("Added network_ssid column to existing table")
-    conn.commit()
-    conn.close()
-
-def log_attempt(username, password, a, response_status, response_message, network_name=None, network_ssid=None):
-    """Log each login attempt in the database."""
-    conn = sqlite3.connect(DB_NAME)
-    cursor = conn.cursor()
-    # Store encrypted password in DB
-    cursor.execute("""
-        INSERT INTO login_attempts (timestamp, network_name, network_ssid, username, password, a, response_status, response_message)
-        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-    """, (datetime.datetime.now(), network_name, network_ssid, username, "******", a, response_status, response_message))
-    conn.commit()
-    conn.close()
+    """Open the database and apply any pending schema migrations.
+
+    The connection stays open for the rest of the process (see log_store).
+    """
+    get_store(DB_NAME)
+
+def log_attempt(username, password, a, response_status, response_message, network_name=None, network_ssid=None,
+                reason=None):
+    """Log each login attempt in the database.
+
+    The row is queued and written by a background thread, so the login path
+    does not wait for the disk. Queued rows are written before any read and
+    on exit. ``reason`` tags special logins (see session_scheduler).
+    """
+    # The password is never stored
+    get_store(DB_NAME).submit_attempt(
+        (now_epoch(), network_name, network_ssid, username, "******", a, response_status, response_message, reason)
+    )
 
 # --- HELPER FUNCTIONS ---
 def extract_message(response_text):
@@ -172,23 +116,36 @@ def extract_message(response_text):
     return match.group(1) if match else "Unknown response"
 
 # --- MAIN WIFI LOGIN FUNCTION ---
-def wifi_login(network_name=None):
-    """Perform the WiFi login request and log the result."""
+def wifi_login(network_name=None, session=None, config=None, reason=None):
+    """Perform the WiFi login request and log the result.
+
+    The optional ``session`` and ``config`` arguments let a long-running caller
+    (see ``run_daemon``) reuse its HTTP session and parsed configuration
+    instead of recreating them on every attempt. ``reason`` is stored with
+    the logged attempt.
+
+    Returns True if the portal answered with HTTP 200, False otherwise.
+    """
+    import requests
+    from portal_client import post_with_retry
+
     # As Per setup.md, user needs to modify these values
     url = "POST url from the inspect element"  # Change Required
     username = "username"
     password = "password"
     a_value = str(int(datetime.datetime.now().timestamp()))  # Generate dynamic 'a' value, you may refer to the screenshots in the setup.md file
     # Load config when needed
-    config = load_config()
-    global URL, USERNAME, PASSWORD, PRODUCT_TYPE
-    URL = config["wifi_url"]
-    USERNAME = config["username"]
-    # Decrypt password for login
-    PASSWORD = decrypt_if_encrypted(config["password"], FERNET)
+    if config is None:
+        config = load_config()
+    global URL, USERNAME, PASSWORD, PRODUCT_TYPE, ACTIVE_PROFILE, ACTIVE_NETWORK
+    URL = config.get("wifi_url")
+    USERNAME = config.get("username")
+    # Passwords are already decrypted by load_config()
+    PASSWORD = config.get("password")
     PRODUCT_TYPE = config.get("product_type", "0")
     network_profile_name = "legacy"
     network_ssid = "Unknown"
+    profile_config = config
     
     try:
         if MULTI_NETWORK_SUPPORT:
@@ -196,6 +153,7 @@ def wifi_login(network_name=None):
             manager = NetworkProfileManager()
             network_profile_name, network_config = manager.get_network_profile(network_name, auto_detect=True)
             network_ssid = network_config.get("ssid", "Unknown")
+            profile_config = network_config
             
             URL = network_config["wifi_url"]
             USERNAME = network_config["username"]
@@ -207,7 +165,6 @@ def wifi_login(network_name=None):
             print(f"🔗 Login URL: {URL}")
         else:
             # Fallback to legacy single network configuration
-            config = load_config()
             URL = config["wifi_url"]
             USERNAME = config["username"]
             PASSWORD = config["password"]
@@ -218,7 +175,7 @@ def wifi_login(network_name=None):
     except Exception as e:
         logger.error(f"Configuration error: {e}")
         print(f"❌ Configuration Error: {e}")
-        return
+        return False
     
     a_value = str(int(datetime.datetime.now().timestamp()))  # Generate dynamic 'a' value
 
@@ -232,7 +189,7 @@ def wifi_login(network_name=None):
     }
 
     try:
-        response = requests.post(URL, data=payload)
+        response = post_with_retry(URL, payload, profile_config, session=session)
         response_status = response.status_code
         response_message = extract_message(response.text)
 
@@ -246,46 +203,205 @@ def wifi_login(network_name=None):
 
         # Log the attempt in SQLite with network information
         log_attempt(USERNAME, PASSWORD, a_value, response_status, response_message, 
-                   network_profile_name, network_ssid)
+                   network_profile_name, network_ssid, reason)
+        if response_status == 200:
+            ACTIVE_PROFILE = profile_config
+            ACTIVE_NETWORK = network_profile_name
+            return True
+        return False
 
     except requests.exceptions.RequestException as e:
         print(f"❌ Error: {e}")
         log_attempt(USERNAME, PASSWORD, a_value, "FAILED", str(e), 
-                   network_profile_name, network_ssid)
+                   network_profile_name, network_ssid, reason)
+        return False
+
+# --- DAEMON MODE ---
+DEFAULT_DAEMON_INTERVAL = 60  # seconds between connectivity checks
+DEFAULT_KEEPALIVE_INTERVAL = 180  # seconds between portal keep-alive requests
+
+def run_daemon(network_name=None, interval=None):
+    """
+    Stay resident and log in again whenever connectivity is lost.
+
+    Unlike a cron-driven run, the configuration, Fernet instance, shared HTTP
+    sessions and database connection are created once and kept warm between
+    checks. The check interval comes from ``interval``, then ``daemon.interval``
+    in config.json, then DEFAULT_DAEMON_INTERVAL.
+
+    While logged in, a keep-alive request is sent to the portal every
+    ``daemon.keepalive_interval`` seconds (0 disables it), and once enough
+    history exists the session is renewed ``daemon.relogin_margin`` seconds
+    before its predicted expiry (``daemon.predictive_relogin``). A full login
+    is otherwise only sent when the portal reports the session as gone.
+
+    With ``daemon.watch_network`` (default on) link and SSID changes are
+    watched, so joining a network triggers a check immediately instead of on
+    the next tick. SIGINT/SIGTERM stop the loop cleanly.
+
+    If a ``retention`` section is configured, old login attempts are rolled
+    up and pruned at startup and then every ``retention.interval`` seconds.
+    """
+    import connectivity
+    from portal_client import close_sessions, send_keepalive
+    from retention import RetentionPolicy, DEFAULT_RETENTION_INTERVAL
+    from session_scheduler import ReloginScheduler, DEFAULT_RELOGIN_MARGIN, PROACTIVE_RELOGIN
+
+    global ACTIVE_PROFILE
+    config = load_config()
+    daemon_settings = config.get("daemon", {})
+    if interval is None:
+        interval = daemon_settings.get("interval", DEFAULT_DAEMON_INTERVAL)
+    interval = max(1, int(interval))
+    keepalive_interval = max(0, int(daemon_settings.get("keepalive_interval", DEFAULT_KEEPALIVE_INTERVAL)))
+
+    stop_event = threading.Event()
+    # Set to interrupt the wait between checks (stop request or network change)
+    wake_event = threading.Event()
+    network_changed = threading.Event()
+    link_changed = threading.Event()
+
+    def _request_stop(signum, frame):
+        logger.info(f"Received signal {signum}, stopping daemon")
+        stop_event.set()
+        wake_event.set()
+
+    def _on_network_event(event):
+        if event.type in (NetworkEvent.SSID_CHANGED, NetworkEvent.BSSID_CHANGED):
+            network_changed.set()
+            wake_event.set()
+        elif event.type == NetworkEvent.LINK_UP:
+            # Same network back up: re-check now, but keep the session
+            link_changed.set()
+            wake_event.set()
+
+    signal.signal(signal.SIGINT, _request_stop)
+    signal.signal(signal.SIGTERM, _request_stop)
+
+    store = get_store(DB_NAME)
+    scheduler = None
+    if daemon_settings.get("predictive_relogin", True):
+        scheduler = ReloginScheduler(store, margin=daemon_settings.get("relogin_margin", DEFAULT_RELOGIN_MARGIN))
+    engine = get_probe_engine()
+    retention_settings = config.get("retention", {})
+    retention = RetentionPolicy.from_settings(retention_settings)
+    retention_interval = max(60, int(retention_settings.get("interval", DEFAULT_RETENTION_INTERVAL)))
+    watcher = None
+    if MULTI_NETWORK_SUPPORT and daemon_settings.get("watch_network", True):
+        watcher = NetworkDetector().watch(_on_network_event,
+                                          poll_interval=daemon_settings.get("watch_poll_interval", 5),
+                                          track_bssid=daemon_settings.get("watch_bssid", True))
+    logger.info(f"Daemon started, checking connectivity every {interval}s")
+
+    # Current session: profile name and epoch time of the login, plus the
+    # monotonic time of the predicted proactive re-login
+    session = {"network": None, "started": None, "relogin_at": None}
+
+    def _login(expired=False, reason=None):
+        """Log in once, keeping the daemon alive through unexpected errors."""
+        global ACTIVE_PROFILE
+        if expired and scheduler and session["started"]:
+            scheduler.record_expiry(session["network"], session["started"])
+        ACTIVE_PROFILE = None
+        session.update(network=None, started=None, relogin_at=None)
+        try:
+            wifi_login(network_name, config=config, reason=reason)
+        except Exception as e:
+            logger.error(f"Login cycle failed: {e}")
+        engine.invalidate()
+
+        if ACTIVE_PROFILE:
+            session.update(network=ACTIVE_NETWORK, started=time.time())
+            if scheduler:
+                relogin_epoch = scheduler.next_relogin(ACTIVE_NETWORK, session["started"])
+                if relogin_epoch:
+                    session["relogin_at"] = time.monotonic() + (relogin_epoch - time.time())
+                    logger.info(f"Next proactive re-login in {relogin_epoch - time.time():.0f}s")
+
+    try:
+        next_check = next_keepalive = next_retention = time.monotonic()
+        while not stop_event.is_set():
+            now = time.monotonic()
+
+            if retention.enabled and now >= next_retention:
+                next_retention = now + retention_interval
+                try:
+                    retention.run(store)
+                except Exception as e:
+                    logger.error(f"Retention run failed: {e}")
+
+            if network_changed.is_set():
+                # New network: the old session and cached verdict no longer apply
+                network_changed.clear()
+                logger.info("Network changed, checking connectivity now")
+                ACTIVE_PROFILE = None
+                session.update(network=None, started=None, relogin_at=None)
+                engine.invalidate()
+                next_check = now
+                link_changed.clear()
+            elif link_changed.is_set():
+                link_changed.clear()
+                logger.info("WiFi link came up, checking connectivity now")
+                engine.invalidate()
+                next_check = now
+
+            if session["relogin_at"] and now >= session["relogin_at"]:
+                logger.info("Session is about to expire, logging in again")
+                _login(reason=PROACTIVE_RELOGIN)
+                next_keepalive = time.monotonic() + keepalive_interval
+
+            elif ACTIVE_PROFILE and keepalive_interval and now >= next_keepalive:
+                next_keepalive = now + keepalive_interval
+                if send_keepalive(ACTIVE_PROFILE) is False:
+                    logger.info("Portal session expired, logging in again")
+                    _login(expired=True)
+                    next_check = now + interval
+                    next_keepalive = time.monotonic() + keepalive_interval
+
+            if now >= next_check:
+                next_check = now + interval
+                state = engine.check()
+                if state == connectivity.ONLINE:
+                    logger.debug("Internet connection is active, no login needed")
+                elif engine.needs_login(state):
+                    logger.info(f"Connectivity state is '{state}', attempting login")
+                    _login(expired=state == connectivity.PORTAL)
+                    next_keepalive = time.monotonic() + keepalive_interval
+                else:
+                    logger.info("No network reachable and no captive portal detected, skipping login")
+
+            wake_at = next_check
+            if ACTIVE_PROFILE and keepalive_interval:
+                wake_at = min(wake_at, next_keepalive)
+            if session["relogin_at"]:
+                wake_at = min(wake_at, session["relogin_at"])
+            if retention.enabled:
+                wake_at = min(wake_at, next_retention)
+            wake_event.wait(max(0, wake_at - time.monotonic()))
+            wake_event.clear()
+    finally:
+        if watcher:
+            watcher.stop()
+        close_sessions()
+        close_stores()
+        logger.info("Daemon stopped")
 
 # --- VIEW LOGIN LOGS ---
 def view_logs(limit=5, network_filter=None):
     """Display login logs in a readable format."""
-    conn = sqlite3.connect(DB_NAME)
-    cursor = conn.cursor()
-    
-    # Check if table has new network columns
-    cursor.execute("PRAGMA table_info(login_attempts)")
-    columns = [row[1] for row in cursor.fetchall()]
-    has_network_columns = 'network_name' in columns and 'network_ssid' in columns
+    store = get_store(DB_NAME)
     
-    if has_network_columns:
-        base_query = """
-            SELECT timestamp, network_name, network_ssid, username, a, response_status, response_message 
-            FROM login_attempts 
-        """
-        if network_filter:
-            query = base_query + "WHERE network_name = ? ORDER BY timestamp DESC LIMIT ?"
-            cursor.execute(query, (network_filter, limit))
-        else:
-            query = base_query + "ORDER BY timestamp DESC LIMIT ?"
-            cursor.execute(query, (limit,))
+    # Migrations guarantee the network columns exist
+    base_query = """
+        SELECT timestamp, network_name, network_ssid, username, a, response_status, response_message 
+        FROM login_attempts 
+    """
+    if network_filter:
+        query = base_query + "WHERE network_name = ? ORDER BY timestamp DESC LIMIT ?"
+        logs = store.query(query, (network_filter, limit))
     else:
-        # Legacy table structure
-        cursor.execute("""
-            SELECT timestamp, username, a, response_status, response_message 
-            FROM login_attempts 
-            ORDER BY timestamp DESC 
-            LIMIT ?
-        """, (limit,))
-
-    logs = cursor.fetchall()
-    conn.close()
+        query = base_query + "ORDER BY timestamp DESC LIMIT ?"
+        logs = store.query(query, (limit,))
 
     if not logs:
         filter_msg = f" for network '{network_filter}'" if network_filter else ""
@@ -297,21 +413,13 @@ def view_logs(limit=5, network_filter=None):
     logger.info("=" * 80)
 
     for log in logs:
-        if has_network_columns:
-            timestamp, network_name, network_ssid, username, a, status, message = log
-            logger.info(f"Time: {timestamp}")
-            logger.info(f"Network: {network_name} ({network_ssid})")
-            logger.info(f"Username: {username}")
-            logger.info(f"Session ID (a): {a}")
-            logger.info(f"Status: {status}")
-            logger.info(f"Message: {message}")
-        else:
-            timestamp, username, a, status, message = log
-            logger.info(f"Time: {timestamp}")
-            logger.info(f"Username: {username}")
-            logger.info(f"Session ID (a): {a}")
-            logger.info(f"Status: {status}")
-            logger.info(f"Message: {message}")
+        timestamp, network_name, network_ssid, username, a, status, message = log
+        logger.info(f"Time: {format_timestamp(timestamp)}")
+        logger.info(f"Network: {network_name} ({network_ssid})")
+        logger.info(f"Username: {username}")
+        logger.info(f"Session ID (a): {a}")
+        logger.info(f"Status: {status}")
+        logger.info(f"Message: {message}")
         logger.info("-" * 80)
 
 def parse_arguments():
@@ -373,27 +481,40 @@ def parse_arguments():
 
 def clear_logs():
     """Deletes all logs from the login_attempts table."""
-    conn = sqlite3.connect(DB_NAME)
-    cursor = conn.cursor()
-    cursor.execute("DELETE FROM login_attempts")
-    conn.commit()
-    conn.close()
+    get_store(DB_NAME).clear_attempts()
     print("✅ All logs have been cleared.")
 
+def apply_retention():
+    """Roll up and prune login attempts older than the configured retention."""
+    from retention import RetentionPolicy
+
+    policy = RetentionPolicy.from_settings(load_config().get("retention"))
+    if not policy.enabled:
+        print("ℹ️ No retention configured. Set \"retention\": {\"days\": N} in config.json.")
+        return
+    pruned = policy.run(get_store(DB_NAME), convert_vacuum=True)
+    print(f"✅ Rolled up {pruned} login attempts older than {policy.days} days.")
+
 def test_connection(network_name=None):
     """Tests if the login URL is reachable."""
+    import requests
+    from portal_client import get_session, get_timeout
+
     try:
         if MULTI_NETWORK_SUPPORT:
             manager = NetworkProfileManager()
             network_profile_name, network_config = manager.get_network_profile(network_name, auto_detect=True)
             url = network_config["wifi_url"]
+            profile_config = network_config
             print(f"🔗 Testing connection for network '{network_profile_name}' to {url}...")
         else:
             config = load_config()
             url = config["wifi_url"]
+            profile_config = config
             print(f"🔗 Testing connection to {url}...")
         
-        response = requests.head(url, timeout=5) # Use HEAD to be efficient
+        # Use HEAD to be efficient
+        response = get_session(profile_config).head(url, timeout=get_timeout(profile_config))
         if response.status_code == 200:
             print(f"✅ Connection successful! The server responded with status {response.status_code}.")
         else:
@@ -604,17 +725,23 @@ def start_dashboard():
     except FileNotFoundError:
         print("❌ Dashboard server not found. Please ensure dashboard.py exists.")
 
-if __name__ == "__main__":
-    setup_database()  # Ensure the database is set up
+def auto_login(network_name=None):
+    """Log in only if a captive portal is intercepting traffic (default action)."""
+    import connectivity
 
     print("Checking for internet connectivity...")
-    if check_connectivity():
+    state = get_connectivity_state()
+    if state == connectivity.ONLINE:
         print("✅ Internet connection is already active. No login needed.")
+    elif get_probe_engine().needs_login(state):
+        print("🔒 Captive portal detected. Proceeding with login attempt.")
+        wifi_login(network_name)  # Attempt login only when the portal is intercepting traffic
     else:
-        print("❌ No internet connection detected. Proceeding with login attempt.")
-        wifi_login()  # Attempt login only if not connected
-    
-    view_logs(5) # Show last 5 login attempts
+        print("❌ No network connection detected and no captive portal found. Skipping login.")
+
+if __name__ == "__main__":
+    # Arguments are parsed before any network or database work, so each
+    # command only loads and runs what it needs
     parser = argparse.ArgumentParser(
         description="A script to automatically log into captive portal WiFi networks with multi-network support."
     )
@@ -669,11 +796,27 @@ if __name__ == "__main__":
         action='store_true', 
         help="Clear all login logs from the database."
     )
+    parser.add_argument(
+        '--apply-retention',
+        action='store_true',
+        help="Roll up and prune login attempts older than the configured retention period."
+    )
     parser.add_argument(
         '--dashboard', 
         action='store_true', 
         help="Start the web dashboard server for monitoring login attempts."
     )
+    parser.add_argument(
+        '--daemon',
+        action='store_true',
+        help="Run continuously, checking connectivity and logging in again when needed."
+    )
+    parser.add_argument(
+        '--interval',
+        type=int,
+        metavar='SECONDS',
+        help="Seconds between connectivity checks in daemon mode (default: 60 or daemon.interval in config.json)."
+    )
 
     args = parser.parse_args()
     
@@ -692,7 +835,9 @@ if __name__ == "__main__":
         # For operations that need database/config
         try:
             setup_database()  # Ensure the database is always set up
-            if args.login:
+            if args.daemon:
+                run_daemon(args.network, args.interval)
+            elif args.login:
                 wifi_login(args.network)
             elif args.view_logs is not None:
                 view_logs(args.view_logs, args.network_filter)
@@ -700,10 +845,12 @@ if __name__ == "__main__":
                 test_connection(args.network)
             elif args.clear_logs:
                 clear_logs()
+            elif args.apply_retention:
+                apply_retention()
             else:
                 print("No arguments provided. Performing default login action.")
-                wifi_login(args.network)
-                view_logs(1, args.network_filter)
+                auto_login(args.network)
+                view_logs(5, args.network_filter)  # Show last 5 login attempts
                 
         except FileNotFoundError as e:
             print(f"❌ Configuration Error: {e}")